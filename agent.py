@@ -1,12 +1,33 @@
 import numpy as np
-import copy
+from board import geometry
 
 class Agent:
     def __init__(self, size, player_number, adv_number):
         self.size = size
         self.player_number = player_number
         self.adv_number = adv_number
-        self._grid = np.zeros(shape=(self.size, self.size))
+        # One bitboard per player, indexed by player number (slot 0 unused)
+        self._geometry = geometry(size)
+        self._stones = [0, 0, 0]
+        # Per-cell mirror of the bitboards so single-cell reads stay cheap
+        self._cells = [0] * (size * size)
+        # Empty cells as a doubly linked list in index order (the last slot
+        # is the list head), so removal, re-insertion and iteration in
+        # free_moves order need no scan of the board
+        cells = size * size
+        self._next = list(range(1, cells + 1)) + [0 if cells else cells]
+        self._prev = [cells] + list(range(cells))
+        self._free = cells
+        # Zobrist hash of the stones, kept up to date by set_hex, and the
+        # hash of the same stones turned by 180 degrees (cell i lands on
+        # cell cells-1-i), which is the same position for both players
+        self._hash = 0
+        self._rotated_hash = 0
+        # Seconds left on this player's clock, set by the Controller before
+        # each step() (None when the game is untimed)
+        self.time_left = None
+        # (coordinate, previous owner) for every play() not yet undone
+        self._history = []
         self.name = "Agent"
 
     def step(self):
@@ -16,62 +37,151 @@ class Agent:
     def update(self, move_other_player):
         """To be implemented by subclasses"""
         pass
-    
+
+    def end_game(self, winner):
+        """Called once the game is over; subclasses may save what they learned"""
+        pass
+
     def get_grid_size(self):
         """Returns size of the grid"""
         return self.size
-    
+
     def set_hex(self, player, coordinate):
         """Set a hexagon to a player"""
-        self._grid[coordinate[1], coordinate[0]] = player
-        
+        index = coordinate[0] * self.size + coordinate[1]
+        bit = self._geometry.bits[index]
+        previous = self._cells[index]
+        zobrist = self._geometry.zobrist
+        if previous:
+            self._stones[previous] ^= bit
+            if not player:
+                self._link(index)
+        if player:
+            if not previous:
+                self._unlink(index)
+            self._stones[player] |= bit
+        self._hash ^= zobrist[previous][index] ^ zobrist[player][index]
+        mirror = len(self._cells) - 1 - index
+        self._rotated_hash ^= zobrist[previous][mirror] ^ zobrist[player][mirror]
+        self._cells[index] = player
+
+    def _unlink(self, index):
+        nxt, prev = self._next, self._prev
+        nxt[prev[index]] = nxt[index]
+        prev[nxt[index]] = prev[index]
+        self._free -= 1
+
+    def _link(self, index):
+        # The closest empty cell below index, or the head, precedes it
+        below = ~(self._stones[1] | self._stones[2]) & ((1 << index) - 1)
+        before = below.bit_length() - 1 if below else len(self._cells)
+        nxt, prev = self._next, self._prev
+        nxt[index] = nxt[before]
+        prev[index] = before
+        prev[nxt[before]] = index
+        nxt[before] = index
+        self._free += 1
+
     def get_hex(self, coordinate):
         """Get the player number at a coordinate"""
-        return self._grid[coordinate[1], coordinate[0]]
-        
+        return self._cells[coordinate[0] * self.size + coordinate[1]]
+
     def neighbors(self, coordinates):
         """Get valid neighboring coordinates"""
-        neighbors = []
-        directions = [[0, -1], [1, -1], [1, 0], [0, 1], [-1, 1], [-1, 0]]
-        for dir in directions:
-            new_coordinates = [coordinates[0]+dir[0], coordinates[1]+dir[1]]
-            if 0 <= new_coordinates[0] < self.size and 0 <= new_coordinates[1] < self.size:
-                neighbors.append(new_coordinates)
-        return neighbors
-    
+        # Built from the shared per-size table, so callers may modify the result
+        return [[x, y] for x, y in self._geometry.neighbor_coords[coordinates[0] * self.size + coordinates[1]]]
+
     def check_win(self, player):
         """Check if a player has won"""
-        if player == 1:
-            start = [[0, y] for y in range(self.size)]
-            end = self.size - 1
-            axis = 0
-        else:
-            start = [[x, 0] for x in range(self.size)]
-            end = self.size - 1
-            axis = 1
-
-        for s in start:
-            if self._dfs(s, player, end, axis, set()):
-                return True
-        return False
-
-    def _dfs(self, current, player, end, axis, visited):
-        """DFS helper for win checking"""
-        if current[axis] == end:
-            return True
-        visited.add(tuple(current))
-        for neighbor in self.neighbors(current):
-            if tuple(neighbor) not in visited and self.get_hex(neighbor) == player:
-                if self._dfs(neighbor, player, end, axis, visited):
-                    return True
-        return False
+        return self._geometry.connects(self._stones[player], player)
 
     def free_moves(self):
         """Get all available moves"""
-        return [[x, y] for x in range(self.size) for y in range(self.size) if self.get_hex([x, y]) == 0]
-    
+        coords = self._geometry.coords
+        nxt = self._next
+        head = len(self._cells)
+        moves = []
+        index = nxt[head]
+        while index != head:
+            x, y = coords[index]
+            moves.append([x, y])
+            index = nxt[index]
+        return moves
+
+    def free_count(self):
+        """Number of empty cells"""
+        return self._free
+
+    def is_free(self, coordinate):
+        """Whether a coordinate is empty"""
+        return not self._cells[coordinate[0] * self.size + coordinate[1]]
+
+    def position_key(self):
+        """Zobrist hash of the current position"""
+        return self._hash
+
+    def canonical_key(self):
+        """(key, rotated): one key for a position and its 180-degree rotation.
+
+        key is the smaller of the two hashes; rotated says it is the
+        rotation's, in which case moves stored under the key are for the
+        rotated board and go through rotate() on the way in and out.
+        """
+        if self._rotated_hash < self._hash:
+            return self._rotated_hash, True
+        return self._hash, False
+
+    def rotate(self, move):
+        """The cell that move lands on when the board is turned by 180 degrees"""
+        return [self.size - 1 - move[0], self.size - 1 - move[1]]
+
+    def to_move(self):
+        """Player whose turn it is, assuming player 1 moved first"""
+        ones = bin(self._stones[1]).count("1")
+        twos = bin(self._stones[2]).count("1")
+        return 1 if ones == twos else 2
+
+    def play(self, move, player=None):
+        """Place a stone in place and remember it so undo() can take it back.
+
+        Defaults to the player whose turn it is. Search code should prefer
+        play()/undo() over copy(): everything set_hex maintains is restored.
+        """
+        if player is None:
+            player = self.to_move()
+        self._history.append((move, self.get_hex(move)))
+        self.set_hex(player, move)
+
+    def undo(self):
+        """Take back the most recent play()"""
+        move, previous = self._history.pop()
+        self.set_hex(previous, move)
+        return move
+
+    def ply(self):
+        """Number of play() calls not yet undone"""
+        return len(self._history)
+
+    def rewind(self, ply):
+        """Undo plays until only ply of them remain"""
+        while len(self._history) > ply:
+            self.undo()
+
+    def to_array(self):
+        """Return the board as a size x size array indexed [y, x]"""
+        # _cells is indexed x*size + y, i.e. an [x, y] array once reshaped
+        return np.array(self._cells, dtype=float).reshape(self.size, self.size).T
+
     def copy(self):
         """Create a deep copy of the agent"""
         new_agent = Agent(self.size, self.player_number, self.adv_number)
-        new_agent._grid = copy.deepcopy(self._grid)
-        return new_agent
\ No newline at end of file
+        new_agent._stones = self._stones[:]
+        new_agent._cells = self._cells[:]
+        new_agent._history = self._history[:]
+        new_agent._next = self._next[:]
+        new_agent._prev = self._prev[:]
+        new_agent._free = self._free
+        new_agent._hash = self._hash
+        new_agent._rotated_hash = self._rotated_hash
+        return new_agent
+
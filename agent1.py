@@ -1,94 +1,329 @@
 import numpy as np
 from agent import Agent
+from analysis import CellAnalysis
+from batch import BatchEvaluator
+from book import default_book
+from search import (EXACT, MoveOrderer, SearchTimeout, TimeManager, TranspositionTable,
+                    bound_flag, probe_window)
+from solver import ProofNumberSolver
 
 class CustomPlayer(Agent):
     def __init__(self, size, player_number, adv_number):
         super().__init__(size, player_number, adv_number)
         self.name = "HexMaster"
-        self.max_depth = 3  # Deeper search than agent2
+        self.max_depth = 3  # Deeper search than agent2; only a cap when untimed
+        self.clock = TimeManager()
+        self.tt = TranspositionTable()  # set to None to search without it
+        # Optional store.PositionStore that deep TT entries are read from
+        # and written back to at the end of every game
+        self.store = None
+        self.orderer = MoveOrderer(size)
+        self.branch_width = 7  # moves searched below the root (None for all)
+        # Optional evaluation.Evaluator replacing the hand-weighted formula in
+        # evaluate_board, e.g. evaluation.ResistanceEvaluator(size) or a
+        # network.NetworkEvaluator; its priors, if any, order the moves
+        self.evaluator = None
+        # Scores all leaves below a depth-1 node at once (None for one at a time)
+        self.batch = BatchEvaluator(size)
+        # Drops dead, captured and bridge-carrier cells and forces bridge
+        # saves before a node is expanded (None to search every empty cell)
+        self.analysis = CellAnalysis(size)
+        # Opening book probed before any search (None to always search)
+        self.book = default_book()
+        # Exact solver tried first once fewer than solve_below cells are
+        # empty, with solve_share of the move's budget (None to never solve)
+        self.solver = ProofNumberSolver(size)
+        self.solve_below = 30
+        self.solve_share = 0.3
+        self._solver_stats = {}
+        self.nodes = 0
+        self.depth_reached = 0
+        self.score = None  # root value of the deepest completed iteration
+        self.search_stats = {}
         
     def step(self):
+        self.nodes = 0
+        self.depth_reached = 0
+        self.score = None
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.store is not None:
+            self.store.new_search()
+        self.orderer.new_search()
+        if self.analysis is not None:
+            self.analysis.new_search()
+        self._solver_stats = {}
+        self._record_stats()  # so the early returns below report an empty search
+
+        if self.book is not None:
+            # Only solver-checked book moves are played; the rest are searched
+            move = self.book.lookup(self, checked=True)
+            if move is not None:
+                self.set_hex(self.player_number, move)
+                return move
+
         # First move optimization - if we're player 1, take center as it's strong in Hex
-        if len(self.free_moves()) == self.size * self.size:
+        if self.free_count() == self.size * self.size:
             if self.player_number == 1:  # Player 1 connects horizontally
                 move = [self.size // 2, self.size // 2]
                 self.set_hex(self.player_number, move)
                 return move
         
+        free = self.free_moves()
+
         # Look for immediate winning moves
-        for move in self.free_moves():
-            test_board = self.copy()
-            test_board.set_hex(self.player_number, move)
-            if test_board.check_win(self.player_number):
+        for move in free:
+            self.play(move, self.player_number)
+            wins = self.check_win(self.player_number)
+            self.undo()
+            if wins:
                 self.set_hex(self.player_number, move)
                 return move
                 
         # Look for moves that block opponent's win
-        for move in self.free_moves():
-            test_board = self.copy()
-            test_board.set_hex(self.adv_number, move)
-            if test_board.check_win(self.adv_number):
+        for move in free:
+            self.play(move, self.adv_number)
+            wins = self.check_win(self.adv_number)
+            self.undo()
+            if wins:
                 self.set_hex(self.player_number, move)
                 return move
                 
-        # Use minimax with alpha-beta pruning for regular moves
+        budget = self.clock.start(self.time_left, len(free))
+        if self.solver is not None and len(free) < self.solve_below:
+            move = self._solve(budget)
+            if move is not None:
+                self._record_stats()
+                self.set_hex(self.player_number, move)
+                return move
+
+        # Iterative deepening with alpha-beta: search one ply deeper each
+        # round while the clock allows and keep the move of the last round
+        # that completed. Without a clock this stops at max_depth.
+        max_depth = self.max_depth if budget is None else len(free) - 1
+        root = self.ply()
+        best_move = None
+        candidates = self._candidates(self, self.player_number)
+        priors = self._priors(self, self.player_number)
+        for depth in range(1, max(max_depth, 1) + 1):
+            # Best move of the previous round first, then the usual ordering
+            moves = self.orderer.order(self, self.player_number, root, candidates, best_move, priors)
+            try:
+                move, value = self._search_root(moves, depth)
+            except SearchTimeout:
+                self.rewind(root)
+                break
+            best_move = move
+            self.depth_reached = depth
+            self.score = value
+            if abs(value) >= 1000 or not self.clock.can_deepen():
+                break  # decided, or no time for another round
+        
+        if best_move is None:
+            best_move = self._fallback_move(moves)
+        
+        self._record_stats()
+        self.set_hex(self.player_number, best_move)
+        return best_move
+
+    def _search_root(self, moves, depth):
+        """One alpha-beta pass over the root moves, searching depth plies below each"""
         best_move = None
         best_value = float('-inf')
         alpha = float('-inf')
         beta = float('inf')
         
-        for move in self.free_moves():
-            new_board = self.copy()
-            new_board.set_hex(self.player_number, move)
-            value = self.minimax(new_board, self.max_depth, alpha, beta, False)
+        for move in moves:
+            self.play(move, self.player_number)
+            value = self.minimax(self, depth, alpha, beta, False)
+            self.undo()
             if value > best_value:
                 best_value = value
                 best_move = move
             alpha = max(alpha, best_value)
-        
-        if best_move is None:  # Fallback to first available move
-            best_move = self.free_moves()[0]
-        
-        self.set_hex(self.player_number, best_move)
-        return best_move
+        return best_move, best_value
 
     def update(self, move_other_player):
         self.set_hex(self.adv_number, move_other_player)
+
+    def end_game(self, winner):
+        if self.store is not None and self.tt is not None:
+            self.store.save(self.tt)
+
+    def _candidates(self, board, player):
+        """Moves worth searching for player.
+
+        Replies are only forced below the root: there the last play() is
+        known, and the root itself is searched in full so a win elsewhere
+        is never cut away.
+        """
+        if self.analysis is None:
+            return board.free_moves()
+        last = board._history[-1][0] if board._history else None
+        return self.analysis.candidates(board, player, last)
+
+    def _priors(self, board, player):
+        return None if self.evaluator is None else self.evaluator.priors(board, player)
+
+    def _solve(self, budget):
+        """A proven winning move, or None when the position is lost or unsolved in time"""
+        result, move = self.solver.solve(self, self.player_number,
+                                         None if budget is None else budget * self.solve_share)
+        self._solver_stats = dict(self.solver.stats(), solver_result=result)
+        return move
+
+    def _fallback_move(self, moves):
+        """The move to play when not even depth 1 finished: the stored best move, else the best-ordered one"""
+        if self.tt is not None:
+            key, rotated = self._key(self)
+            entry = self.tt.probe(key)
+            if entry is not None and entry[3] is not None:
+                move = self.rotate(entry[3]) if rotated else entry[3]
+                if move in moves:
+                    return move
+        return moves[0]
+
+    def _key(self, board):
+        """TT key and rotated flag: canonical only while the evaluation cannot tell a position from its rotation"""
+        if self.evaluator is None or self.evaluator.symmetric:
+            return board.canonical_key()
+        return board._hash, False
+
+    def _record_stats(self):
+        self.search_stats = {"nodes": self.nodes, "depth": self.depth_reached, "score": self.score}
+        self.search_stats.update(self._solver_stats)
+        if self.analysis is not None:
+            self.search_stats["kept_ratio"] = self.analysis.kept_ratio()
+        if self.tt is not None:
+            self.search_stats.update(tt_probes=self.tt.probes, tt_hits=self.tt.hits,
+                                     tt_hit_rate=self.tt.hit_rate())
+        if self.store is not None:
+            self.search_stats.update(store_probes=self.store.probes, store_hits=self.store.hits)
     
     def minimax(self, board, depth, alpha, beta, is_maximizing):
+        self.nodes += 1
+        self.clock.poll()
         # Check for terminal conditions
         if board.check_win(self.player_number):
             return 1000 + depth  # Winning sooner is better
         if board.check_win(self.adv_number):
             return -1000 - depth  # Losing later is better
-        if depth == 0 or len(board.free_moves()) == 0:
-            return self.evaluate_board(board)
-        
-        if is_maximizing:
+
+        # Stone placements commute, so the same position is reached through
+        # many move orders; reuse what was found the first time. A position
+        # and its 180-degree rotation share an entry (see _key), whose move
+        # is stored for the canonical orientation.
+        key, rotated = self._key(board)
+        tt_move = None
+        window = (alpha, beta)
+        if self.tt is not None:
+            if self.store is not None and depth >= self.store.min_depth:
+                self.store.load(self.tt, key)
+            value, alpha, beta, tt_move = probe_window(self.tt, key, depth, alpha, beta)
+            if value is not None:
+                return value
+            if rotated and tt_move is not None:
+                tt_move = board.rotate(tt_move)
+
+        if depth == 0 or board.free_count() == 0:
+            value = self.evaluate_board(board)
+            if self.tt is not None:
+                self.tt.store(key, depth, EXACT, value, None)
+            return value
+        player = self.player_number if is_maximizing else self.adv_number
+        moves = self._candidates(board, player)
+        ply = board.ply()
+        # Priors decide which moves survive branch_width; at depth 1 a
+        # wrong cut costs a leaf, not a subtree, so they are skipped there
+        priors = self._priors(board, player) if depth > 1 else None
+        moves = self.orderer.order(board, player, ply, moves, tt_move, priors)
+        moves = moves[:self.branch_width]  # Limit branching
+        best_move = None
+        if depth == 1 and self.batch is not None:
+            value, best_move = self._search_leaves(board, moves, alpha, beta, is_maximizing, player, ply)
+        elif is_maximizing:
             value = float('-inf')
-            for move in board.free_moves()[:min(len(board.free_moves()), 7)]:  # Limit branching
-                new_board = board.copy()
-                new_board.set_hex(self.player_number, move)
-                value = max(value, self.minimax(new_board, depth - 1, alpha, beta, False))
+            for move in moves:
+                board.play(move, self.player_number)
+                child = self.minimax(board, depth - 1, alpha, beta, False)
+                board.undo()
+                if child > value or best_move is None:
+                    value, best_move = child, move
                 alpha = max(alpha, value)
                 if beta <= alpha:
+                    self.orderer.record_cutoff(move, player, ply, depth)
                     break
-            return value
         else:
             value = float('inf')
-            for move in board.free_moves()[:min(len(board.free_moves()), 7)]:  # Limit branching
-                new_board = board.copy()
-                new_board.set_hex(self.adv_number, move)
-                value = min(value, self.minimax(new_board, depth - 1, alpha, beta, True))
+            for move in moves:
+                board.play(move, self.adv_number)
+                child = self.minimax(board, depth - 1, alpha, beta, True)
+                board.undo()
+                if child < value or best_move is None:
+                    value, best_move = child, move
                 beta = min(beta, value)
                 if beta <= alpha:
+                    self.orderer.record_cutoff(move, player, ply, depth)
                     break
-            return value
+        if self.tt is not None:
+            if rotated and best_move is not None:
+                best_move = board.rotate(best_move)
+            self.tt.store(key, depth, bound_flag(value, *window), value, best_move)
+        return value
     
+    def _search_leaves(self, board, moves, alpha, beta, is_maximizing, player, ply):
+        """The move loop of a depth-1 node, with the leaves scored in one batch.
+
+        The first (best-ordered) move is searched on its own, since it
+        often causes a cutoff by itself; the others are scored together
+        only if it does not. Returns the same (value, best move) as
+        searching each child, except that batched leaves neither probe nor
+        fill the transposition table. With an evaluator, the leaves go to
+        its evaluate_batch in one call.
+        """
+        won = 1000 if player == self.player_number else -1000
+        value = float('-inf') if is_maximizing else float('inf')
+        best_move = None
+        scored = None
+        for i, move in enumerate(moves):
+            if i == 0:
+                board.play(move, player)
+                child = self.minimax(board, 0, alpha, beta, not is_maximizing)
+                board.undo()
+            else:
+                if scored is None:
+                    wins, scores = self._score_leaves(board, moves[1:], player)
+                    self.nodes += len(moves) - 1
+                    scored = [won if win else score for win, score in zip(wins.tolist(), scores.tolist())]
+                child = scored[i - 1]
+            if is_maximizing:
+                if child > value or best_move is None:
+                    value, best_move = child, move
+                alpha = max(alpha, value)
+            else:
+                if child < value or best_move is None:
+                    value, best_move = child, move
+                beta = min(beta, value)
+            if beta <= alpha:
+                self.orderer.record_cutoff(move, player, ply, 1)
+                break
+        return value, best_move
+
+    def _score_leaves(self, board, moves, player):
+        """(wins, scores) for player playing each of moves, as evaluate_board would score them"""
+        if self.evaluator is None:
+            return self.batch.custom_scores(board, moves, player, self.player_number)
+        cells = self.batch.stack(board, moves, player).reshape(len(moves), -1)
+        return (self.batch.wins(board, moves, player),
+                self.evaluator.evaluate_batch(cells, self.player_number, 3 - player))
+
     def evaluate_board(self, board):
         """
         Sophisticated board evaluation specialized for Hex
         """
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(board, self.player_number)
+
         # Calculate our connectivity score
         player_score = self.connectivity_score(board, self.player_number)
         
@@ -107,19 +342,17 @@ class CustomPlayer(Agent):
         score = 0
         visited = set()
         
-        for x in range(board.size):
-            for y in range(board.size):
-                coord = (x, y)
-                if coord not in visited and board.get_hex([x, y]) == player:
-                    group, group_size = self._get_connected_group(board, [x, y], player)
-                    visited.update(group)
-                    
-                    # Group size squared (larger groups are exponentially better)
-                    score += group_size * group_size
-                    
-                    # Extra points for groups with many neighbors
-                    empty_neighbors = self._count_empty_neighbors(board, group)
-                    score += empty_neighbors * 2
+        for index, owner in enumerate(board._cells):
+            if owner == player and index not in visited:
+                group, group_size = self._get_connected_group(board, index, player)
+                visited.update(group)
+                
+                # Group size squared (larger groups are exponentially better)
+                score += group_size * group_size
+                
+                # Extra points for groups with many neighbors
+                empty_neighbors = self._count_empty_neighbors(board, group)
+                score += empty_neighbors * 2
         
         return score
     
@@ -139,11 +372,13 @@ class CustomPlayer(Agent):
                         if y+i < board.size and board.get_hex([i, y+i]) == player:
                             score += 5
                             
+            # The right edge mirrors the left one under the 180-degree
+            # rotation, so a position and its rotation score the same
             for y in range(board.size):
                 if board.get_hex([board.size-1, y]) == player:
                     # Look for pieces extending diagonally from right edge
                     for i in range(1, min(board.size, 4)):
-                        if y+i < board.size and board.get_hex([board.size-1-i, y+i]) == player:
+                        if y-i >= 0 and board.get_hex([board.size-1-i, y-i]) == player:
                             score += 5
             
             score += left_edge * 10 + right_edge * 10
@@ -164,7 +399,7 @@ class CustomPlayer(Agent):
                 if board.get_hex([x, board.size-1]) == player:
                     # Look for pieces extending diagonally from bottom edge
                     for i in range(1, min(board.size, 4)):
-                        if x+i < board.size and board.get_hex([x+i, board.size-1-i]) == player:
+                        if x-i >= 0 and board.get_hex([x-i, board.size-1-i]) == player:
                             score += 5
             
             score += top_edge * 10 + bottom_edge * 10
@@ -172,27 +407,30 @@ class CustomPlayer(Agent):
         return score
     
     def _get_connected_group(self, board, start, player):
-        """Find all coordinates in a connected group"""
-        group = set([(start[0], start[1])])
+        """Find the flat indices of all cells in a connected group"""
+        cells = board._cells
+        adjacent = board._geometry.adjacent
+        group = {start}
         frontier = [start]
         
         while frontier:
             current = frontier.pop()
-            for neighbor in board.neighbors(current):
-                neighbor_tuple = (neighbor[0], neighbor[1])
-                if board.get_hex(neighbor) == player and neighbor_tuple not in group:
-                    group.add(neighbor_tuple)
+            for neighbor in adjacent[current]:
+                if cells[neighbor] == player and neighbor not in group:
+                    group.add(neighbor)
                     frontier.append(neighbor)
         
         return group, len(group)
     
     def _count_empty_neighbors(self, board, group):
-        """Count empty neighbors of a group"""
+        """Count empty neighbors of a group of flat indices"""
+        cells = board._cells
+        adjacent = board._geometry.adjacent
         empty_neighbors = set()
         
-        for x, y in group:
-            for neighbor in board.neighbors([x, y]):
-                if board.get_hex(neighbor) == 0:  # Empty cell
-                    empty_neighbors.add((neighbor[0], neighbor[1]))
+        for index in group:
+            for neighbor in adjacent[index]:
+                if cells[neighbor] == 0:  # Empty cell
+                    empty_neighbors.add(neighbor)
         
-        return len(empty_neighbors)
\ No newline at end of file
+        return len(empty_neighbors)
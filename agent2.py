@@ -1,79 +1,280 @@
 import numpy as np
 import copy
 from agent import Agent
+from analysis import CellAnalysis
+from batch import BatchEvaluator
+from search import (EXACT, MoveOrderer, SearchTimeout, TimeManager, TranspositionTable, bound_flag,
+                    move_first, probe_window)
+from solver import ProofNumberSolver
 
 class MinimaxPlayer(Agent):
     def __init__(self, size, player_number, adv_number):
         super().__init__(size, player_number, adv_number)
         self.name = "Minimax"
+        self.max_depth = 1  # plies searched below each root move when untimed
+        self.clock = TimeManager()
+        self.tt = TranspositionTable()  # set to None to search without it
+        self.store = None  # optional store.PositionStore shared across games
+        # Optional evaluation.Evaluator used instead of the largest group;
+        # its priors, if any, decide the order moves are searched in
+        self.evaluator = None
+        # Scores all leaves below a depth-1 node at once (None for one at a time)
+        self.batch = BatchEvaluator(size)
+        # Prunes and forces moves by local patterns (None to search every empty cell)
+        self.analysis = CellAnalysis(size)
+        # Exact solver tried first below solve_below empty cells (None to never solve)
+        self.solver = ProofNumberSolver(size)
+        self.solve_below = 30
+        self.solve_share = 0.3
+        self._solver_stats = {}
+        self.nodes = 0
+        self.depth_reached = 0
+        self.score = None  # root value of the deepest completed iteration
+        self.search_stats = {}
 
     def step(self):
-        best_move = self.free_moves()[0]
+        self.nodes = 0
+        self.depth_reached = 0
+        self.score = None
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.store is not None:
+            self.store.new_search()
+        if self.analysis is not None:
+            self.analysis.new_search()
+        self._solver_stats = {}
+        budget = self.clock.start(self.time_left, self.free_count())
+        if self.solver is not None and self.free_count() < self.solve_below:
+            result, move = self.solver.solve(self, self.player_number,
+                                             None if budget is None else budget * self.solve_share)
+            self._solver_stats = dict(self.solver.stats(), solver_result=result)
+            if result:
+                self._record_stats()
+                self.set_hex(self.player_number, move)
+                return move
+        free = self._by_prior(self, self.player_number, self._candidates(self, self.player_number))
+        max_depth = self.max_depth if budget is None else self.free_count() - 1
+
+        # Iterative deepening: keep the move of the deepest completed pass
+        root = self.ply()
+        best_move = None
+        for depth in range(1, max(max_depth, 1) + 1):
+            try:
+                move, value = self._search_root(free, depth)
+            except SearchTimeout:
+                self.rewind(root)
+                break
+            best_move = move
+            self.depth_reached = depth
+            self.score = value
+            if value in (np.inf, -np.inf) or not self.clock.can_deepen():
+                break
+        if best_move is None:
+            best_move = self._fallback_move(free)
+        self._record_stats()
+        self.set_hex(self.player_number, best_move)
+        return best_move
+
+    def _search_root(self, moves, depth):
+        best_move = moves[0]
         best = -np.inf
         alpha = best
-        for move in self.free_moves():
-            new_node = self.copy()
-            new_node.set_hex(self.player_number, move)
-            value = self.alphaBeta(new_node, 1, alpha, np.inf, self.adv_number)
+        for move in moves:
+            self.play(move, self.player_number)
+            value = self.alphaBeta(self, depth, alpha, np.inf, self.adv_number)
+            self.undo()
             if value > best:
                 best = value
                 best_move = move
             alpha = max(alpha, best)
-        self.set_hex(self.player_number, best_move)
-        return best_move
+        return best_move, best
+
+    def _fallback_move(self, moves):
+        """The move to play when not even depth 1 finished: the stored best move, else the one MoveOrderer ranks first.
+
+        Without a policy, moves come in board order, whose first cell is
+        usually a corner.
+        """
+        if self.tt is not None:
+            key, rotated = self._key(self)
+            entry = self.tt.probe(key)
+            if entry is not None and entry[3] is not None:
+                move = self.rotate(entry[3]) if rotated else entry[3]
+                if move in moves:
+                    return move
+        priors = None if self.evaluator is None else self.evaluator.priors(self, self.player_number)
+        return MoveOrderer(self.size).order(self, self.player_number, self.ply(), moves, priors=priors)[0]
+
+    def _key(self, node):
+        """TT key and rotated flag: canonical only while the evaluation cannot tell a position from its rotation"""
+        if self.evaluator is None or self.evaluator.symmetric:
+            return node.canonical_key()
+        return node._hash, False
+
+    def _record_stats(self):
+        self.search_stats = {"nodes": self.nodes, "depth": self.depth_reached, "score": self.score}
+        self.search_stats.update(self._solver_stats)
+        if self.analysis is not None:
+            self.search_stats["kept_ratio"] = self.analysis.kept_ratio()
+        if self.tt is not None:
+            self.search_stats.update(tt_probes=self.tt.probes, tt_hits=self.tt.hits,
+                                     tt_hit_rate=self.tt.hit_rate())
+        if self.store is not None:
+            self.search_stats.update(store_probes=self.store.probes, store_hits=self.store.hits)
 
     def update(self, move_other_player):
         self.set_hex(self.adv_number, move_other_player)
 
+    def end_game(self, winner):
+        if self.store is not None and self.tt is not None:
+            self.store.save(self.tt)
+
+    def _candidates(self, node, player):
+        if self.analysis is None:
+            return node.free_moves()
+        # Replies are only forced below the root, where the last play() is known
+        last = node._history[-1][0] if node._history else None
+        return self.analysis.candidates(node, player, last)
+
+    def _by_prior(self, node, player, moves):
+        priors = None if self.evaluator is None else self.evaluator.priors(node, player)
+        if priors is None:
+            return moves
+        size = self.size
+        return sorted(moves, key=lambda move: -priors[move[0] * size + move[1]])
+
     def alphaBeta(self, node, depth, alpha, beta, player):
+        self.nodes += 1
+        self.clock.poll()
         if node.check_win(self.player_number):
             return np.inf
         if node.check_win(self.adv_number):
             return -np.inf
+
+        # A position and its 180-degree rotation share one entry (see _key)
+        key, rotated = self._key(node)
+        tt_move = None
+        window = (alpha, beta)
+        if self.tt is not None:
+            if self.store is not None and depth >= self.store.min_depth:
+                self.store.load(self.tt, key)
+            value, alpha, beta, tt_move = probe_window(self.tt, key, depth, alpha, beta)
+            if value is not None:
+                return value
+            if rotated and tt_move is not None:
+                tt_move = node.rotate(tt_move)
         if depth == 0:
-            return self.heuristic(node)
+            value = self.heuristic(node)
+            if self.tt is not None:
+                self.tt.store(key, 0, EXACT, value, None)
+            return value
 
-        if player == self.player_number:
+        moves = self._candidates(node, player)
+        if depth > 1:
+            moves = self._by_prior(node, player, moves)
+        moves = move_first(moves, tt_move)
+        best_move = None
+        if depth == 1 and self.batch is not None:
+            value, best_move = self._search_leaves(node, moves, alpha, beta, player)
+        elif player == self.player_number:
             value = -np.inf
-            for move in node.free_moves():
-                new_node = node.copy()
-                new_node.set_hex(self.player_number, move)
-                value = max(value, self.alphaBeta(new_node, depth - 1, alpha, beta, self.adv_number))
+            for move in moves:
+                node.play(move, self.player_number)
+                child = self.alphaBeta(node, depth - 1, alpha, beta, self.adv_number)
+                node.undo()
+                if child > value or best_move is None:
+                    value, best_move = child, move
                 alpha = max(alpha, value)
                 if alpha >= beta:
                     break
-            return value
         else:
             value = np.inf
-            for move in node.free_moves():
-                new_node = node.copy()
-                new_node.set_hex(self.adv_number, move)
-                value = min(value, self.alphaBeta(new_node, depth - 1, alpha, beta, self.player_number))
+            for move in moves:
+                node.play(move, self.adv_number)
+                child = self.alphaBeta(node, depth - 1, alpha, beta, self.player_number)
+                node.undo()
+                if child < value or best_move is None:
+                    value, best_move = child, move
                 beta = min(beta, value)
                 if beta <= alpha:
                     break
-            return value
+        if self.tt is not None:
+            if rotated and best_move is not None:
+                best_move = node.rotate(best_move)
+            self.tt.store(key, depth, bound_flag(value, *window), value, best_move)
+        return value
+
+    def _search_leaves(self, node, moves, alpha, beta, player):
+        """alphaBeta's move loop at depth 1 with the leaves scored in one batch.
+
+        The first move is searched on its own in case it cuts off by itself.
+        With an evaluator, the leaves go to its evaluate_batch in one call.
+        """
+        maximizing = player == self.player_number
+        won = np.inf if maximizing else -np.inf
+        value = -np.inf if maximizing else np.inf
+        best_move = None
+        scored = None
+        for i, move in enumerate(moves):
+            if i == 0:
+                node.play(move, player)
+                child = self.alphaBeta(node, 0, alpha, beta, 3 - player)
+                node.undo()
+            else:
+                if scored is None:
+                    wins, scores = self._score_leaves(node, moves[1:], player)
+                    self.nodes += len(moves) - 1
+                    scored = [won if win else score for win, score in zip(wins.tolist(), scores.tolist())]
+                child = scored[i - 1]
+            if maximizing:
+                if child > value or best_move is None:
+                    value, best_move = child, move
+                alpha = max(alpha, value)
+            else:
+                if child < value or best_move is None:
+                    value, best_move = child, move
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+        return value, best_move
+
+    def _score_leaves(self, node, moves, player):
+        if self.evaluator is None:
+            return self.batch.largest_groups(node, moves, player, self.player_number)
+        cells = self.batch.stack(node, moves, player).reshape(len(moves), -1)
+        return (self.batch.wins(node, moves, player),
+                self.evaluator.evaluate_batch(cells, self.player_number, 3 - player))
 
     def heuristic(self, node):
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(node, self.player_number)
         return self._value_player(node, self.player_number)
 
     def _value_player(self, node, player):
-        coordinates = []
+        cells = node._cells
+        seen = set()
         value = 0
-        for x in range(node.get_grid_size()):
-            for y in range(node.get_grid_size()):
-                if ([x, y] not in coordinates) and (node.get_hex([x, y]) == player):
-                    n = self._number_connected(player, [x, y], node)
-                    coordinates += n[1]
-                    if n[0] > value:
-                        value = n[0]
+        for index, owner in enumerate(cells):
+            if owner == player and index not in seen:
+                group = self._connected_indices(node, index, player)
+                seen.update(group)
+                if len(group) > value:
+                    value = len(group)
         return value
 
     def _number_connected(self, player, coordinate, node):
-        neighbors = [coordinate]
-        for neighbor in neighbors:
-            n = node.neighbors(neighbor)
-            for next_neighbor in n:
-                if node.get_hex(next_neighbor) == player and (next_neighbor not in neighbors):
-                    neighbors.append(next_neighbor)
-        return len(neighbors), neighbors
\ No newline at end of file
+        group = self._connected_indices(node, coordinate[0] * node.size + coordinate[1], player)
+        return len(group), [list(node._geometry.coords[index]) for index in group]
+
+    def _connected_indices(self, node, start, player):
+        """Flat indices of the group of player's stones containing start"""
+        cells = node._cells
+        adjacent = node._geometry.adjacent
+        group = [start]
+        seen = {start}
+        for index in group:
+            for neighbor in adjacent[index]:
+                if cells[neighbor] == player and neighbor not in seen:
+                    seen.add(neighbor)
+                    group.append(neighbor)
+        return group
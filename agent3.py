@@ -0,0 +1,166 @@
+import math
+import time
+import numpy as np
+from agent import Agent
+from search import TimeManager
+
+
+class Node:
+    """Search tree node; wins are counted for the player who moved into it.
+
+    visits counts the iterations through the node and wins the fraction of
+    each iteration's playout batch won, so UCT sees one visit per
+    iteration however many playouts it ran.
+    """
+
+    def __init__(self, parent, move, player, untried):
+        self.parent = parent
+        self.move = move
+        self.player = player
+        self.untried = untried
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTSPlayer(Agent):
+    def __init__(self, size, player_number, adv_number):
+        super().__init__(size, player_number, adv_number)
+        self.name = "MCTS"
+        self.batch_size = 64  # random completions played out per expanded leaf
+        self.iterations = 200  # tree iterations per move when untimed
+        self.exploration = 0.7
+        self.clock = TimeManager()
+        self.search_stats = {}
+        self._rng = np.random.default_rng(np.random.randint(2**31))
+
+        # Cells are numbered x*size + y, so a board reshaped to (size, size)
+        # is indexed [x, y] and player 1 joins row 0 to row size-1.
+        self._shifts = [(0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0)]
+
+    def step(self):
+        free = self.free_moves()
+        # Take an immediate win outright; playouts would find it eventually
+        for move in free:
+            self.play(move, self.player_number)
+            wins = self.check_win(self.player_number)
+            self.undo()
+            if wins:
+                self.search_stats = {"iterations": 0, "playouts": 0, "playouts_per_sec": 0.0}
+                self.set_hex(self.player_number, move)
+                return move
+
+        start = time.perf_counter()
+        self.clock.start(self.time_left, len(free))
+        root = Node(None, None, self.adv_number, self._shuffled(free))
+        iterations = 0
+        playouts = 0
+        while True:
+            if self.clock.deadline is None:
+                if iterations >= self.iterations:
+                    break
+            elif time.perf_counter() > self.clock.deadline:
+                break
+            playouts += self._iterate(root)
+            iterations += 1
+            if not root.untried and not root.children:
+                break
+
+        best = max(root.children, key=lambda child: child.visits) if root.children else None
+        move = best.move if best is not None else free[0]
+        elapsed = time.perf_counter() - start
+        self.search_stats = {
+            "score": best.wins / best.visits if best is not None and best.visits else None,
+            "iterations": iterations,
+            "playouts": playouts,
+            "playouts_per_sec": playouts / elapsed if elapsed > 0 else 0.0,
+        }
+        self.set_hex(self.player_number, move)
+        return move
+
+    def update(self, move_other_player):
+        self.set_hex(self.adv_number, move_other_player)
+
+    def _iterate(self, root):
+        """Select, expand, play out a batch and back up; returns playouts run"""
+        ply = self.ply()
+        node = root
+        # Selection: descend through fully expanded nodes by UCT
+        while not node.untried and node.children:
+            node = self._select(node)
+            self.play(node.move, node.player)
+
+        # Expansion, unless the node already ends the game
+        if node.untried:
+            move = node.untried.pop()
+            player = 3 - node.player
+            self.play(move, player)
+            child = Node(node, move, player, [])
+            if not self.check_win(player):
+                child.untried = self._shuffled(self.free_moves())
+            node.children.append(child)
+            node = child
+
+        if node.move is not None and self.check_win(node.player):
+            # Terminal: the player who just moved has won every playout
+            count = self.batch_size
+            wins = {node.player: count, 3 - node.player: 0}
+        else:
+            count, wins = self._playouts(3 - node.player)
+        self.rewind(ply)
+
+        while node is not None:
+            node.visits += 1
+            node.wins += wins[node.player] / count
+            node = node.parent
+        return count
+
+    def _select(self, node):
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        return max(node.children, key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+    def _shuffled(self, moves):
+        order = self._rng.permutation(len(moves))
+        return [moves[i] for i in order]
+
+    def _playouts(self, to_move):
+        """Fill the empty cells at random batch_size times and count each player's wins.
+
+        Alternating random moves until the board is full is the same as
+        giving the player to move ceil(m/2) of the m empty cells at random,
+        and a full Hex board always has exactly one winner, so the whole
+        batch is decided by one vectorised flood fill.
+        """
+        cells = np.array(self._cells, dtype=np.int8)
+        empty = np.flatnonzero(cells == 0)
+        batch = self.batch_size
+        boards = np.tile(cells, (batch, 1))
+        if len(empty):
+            order = np.argsort(self._rng.random((batch, len(empty))), axis=1)
+            colors = np.full(len(empty), 3 - to_move, dtype=np.int8)
+            colors[:(len(empty) + 1) // 2] = to_move
+            boards[np.arange(batch)[:, None], empty[order]] = colors
+        ones = int(self._player_one_wins(boards).sum())
+        return batch, {1: ones, 2: batch - ones}
+
+    def _player_one_wins(self, boards):
+        """Which full boards of a (batch, cells) array player 1 has connected"""
+        size = self.size
+        stones = (boards == 1).reshape(-1, size, size)
+        reached = np.zeros_like(stones)
+        reached[:, 0, :] = stones[:, 0, :]
+        while True:
+            grown = reached.copy()
+            for dx, dy in self._shifts:
+                # grown[x, y] |= reached[x - dx, y - dy] where both are on the board
+                xs = slice(max(dx, 0), size + min(dx, 0))
+                ys = slice(max(dy, 0), size + min(dy, 0))
+                xd = slice(max(-dx, 0), size + min(-dx, 0))
+                yd = slice(max(-dy, 0), size + min(-dy, 0))
+                grown[:, xs, ys] |= reached[:, xd, yd]
+            grown &= stones
+            if np.array_equal(grown, reached):
+                return reached[:, size - 1, :].any(axis=1)
+            reached = grown
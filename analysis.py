@@ -0,0 +1,205 @@
+from functools import lru_cache
+from board import DIRECTIONS, geometry
+
+
+class CellAnalysis:
+    """Local patterns that rule empty cells in or out before a node is searched.
+
+    Off-board neighbours count as the player whose edge they are (the x
+    edges are player 1's, the y edges player 2's). With cells numbered
+    x*size + y and one bitboard per player, "the neighbour in direction d
+    is c's" is a shifted bitboard, so each pattern below is a handful of
+    big-integer operations:
+
+    - dead: four consecutive neighbours of one colour. Whoever plays the
+      cell gains nothing the neighbours do not already give.
+    - captured: two adjacent empty cells whose other neighbours all belong
+      to one player. That player answers a stone in one with the other, so
+      neither cell matters to either side.
+    - carriers: the two empty cells of an intact opponent bridge, or of a
+      stone's bridge to its own edge (edge template II). An intrusion is
+      simply answered in the other cell, so such cells are dropped unless
+      they intrude on two connections at once or touch the mover's stones
+      or edges (where the stone could also connect something).
+    - forced: if the last stone intruded on one of the mover's bridges or
+      edge templates, the reply in the other carrier cell.
+
+    candidates combines them; it never returns an empty list while cells
+    are free.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._geometry = geometry(size)
+        self._masks = _shift_masks(size)
+        self._edge_templates = _edge_templates(size)
+        self.calls = 0
+        self.free = 0
+        self.kept = 0
+
+    def new_search(self):
+        self.calls = 0
+        self.free = 0
+        self.kept = 0
+
+    def kept_ratio(self):
+        """Candidates kept per empty cell over the calls since new_search"""
+        return self.kept / self.free if self.free else 1.0
+
+    def _neighbour_masks(self, stones, player):
+        """Per direction, the cells whose neighbour that way is player's"""
+        full = self._geometry.full
+        masks = []
+        for shift, valid, edges in self._masks:
+            if shift > 0:
+                owned = (stones >> shift) & valid
+            else:
+                owned = (stones << -shift) & valid & full
+            masks.append(owned | edges[player])
+        return masks
+
+    def dead(self, board):
+        """Bitboard of empty cells with four consecutive neighbours of one colour"""
+        empty = self._geometry.full & ~(board._stones[1] | board._stones[2])
+        dead = 0
+        for player in (1, 2):
+            around = self._neighbour_masks(board._stones[player], player)
+            for first in range(6):
+                run = around[first] & around[(first + 1) % 6] & around[(first + 2) % 6] & around[(first + 3) % 6]
+                dead |= run
+        return dead & empty
+
+    def captured(self, board):
+        """Bitboard of empty cell pairs sealed off by one player"""
+        geo = self._geometry
+        empty = geo.full & ~(board._stones[1] | board._stones[2])
+        captured = 0
+        for player in (1, 2):
+            around = self._neighbour_masks(board._stones[player], player)
+            for d in range(3):
+                opposite = d + 3
+                shift, valid, _ = self._masks[d]
+                # a's neighbours other than b (in direction d) are player's,
+                # and so are b's other than a (in the opposite direction)
+                own_a = empty
+                own_b = empty
+                for k in range(6):
+                    if k != d:
+                        own_a &= around[k]
+                    if k != opposite:
+                        own_b &= around[k]
+                if shift > 0:
+                    pairs = own_a & (own_b >> shift) & valid
+                    captured |= pairs | (pairs << shift)
+                else:
+                    pairs = own_a & (own_b << -shift) & valid & geo.full
+                    captured |= pairs | (pairs >> -shift)
+        return captured & empty
+
+    def carriers(self, board, player):
+        """Bitboard of carrier cells of the opponent's intact connections that intrude on only one"""
+        cells = board._cells
+        opponent = 3 - player
+        geo = self._geometry
+        counts = {}
+        stones = board._stones[opponent]
+        while stones:
+            low = stones & -stones
+            stones ^= low
+            index = low.bit_length() - 1
+            for partner, first, second in geo.bridges[index]:
+                if partner > index and cells[partner] == opponent and not cells[first] and not cells[second]:
+                    counts[first] = counts.get(first, 0) + 1
+                    counts[second] = counts.get(second, 0) + 1
+            for first, second in self._edge_templates[opponent][index]:
+                if not cells[first] and not cells[second]:
+                    counts[first] = counts.get(first, 0) + 1
+                    counts[second] = counts.get(second, 0) + 1
+        carriers = 0
+        for index, count in counts.items():
+            if count == 1:
+                carriers |= geo.bits[index]
+        # A cell touching none of player's stones or edges cannot win at once
+        start, end = geo.edges[player]
+        return carriers & ~geo.dilate(board._stones[player] | start | end)
+
+    def forced(self, board, player, last):
+        """Cells that save a bridge or edge template of player's the stone at last intruded on"""
+        if last is None:
+            return []
+        cells = board._cells
+        geo = self._geometry
+        index = last[0] * self.size + last[1]
+        saves = []
+        for end, partner, other in geo.carried[index]:
+            if cells[end] == player and cells[partner] == player and not cells[other]:
+                saves.append(other)
+        for stone, other in self._edge_templates[player + 2][index]:
+            if cells[stone] == player and not cells[other]:
+                saves.append(other)
+        return sorted(set(saves))
+
+    def candidates(self, board, player, last=None):
+        """The moves worth searching for player, in free_moves order"""
+        geo = self._geometry
+        free = board.free_count()
+        self.calls += 1
+        self.free += free
+        forced = self.forced(board, player, last)
+        if forced:
+            moves = [list(geo.coords[index]) for index in forced]
+        else:
+            empty = geo.full & ~(board._stones[1] | board._stones[2])
+            keep = empty & ~(self.dead(board) | self.captured(board) | self.carriers(board, player))
+            moves = geo.cells_of(keep or empty)
+        self.kept += len(moves)
+        return moves
+
+
+@lru_cache(maxsize=None)
+def _shift_masks(size):
+    """Per direction: (index shift to the neighbour, cells that have one, off-board neighbour by edge owner)"""
+    geo = geometry(size)
+    masks = []
+    for dx, dy in DIRECTIONS:
+        valid = 0
+        edges = {1: 0, 2: 0}
+        for index, (x, y) in enumerate(geo.coords):
+            nx, ny = x + dx, y + dy
+            x_off = not 0 <= nx < size
+            y_off = not 0 <= ny < size
+            if not x_off and not y_off:
+                valid |= 1 << index
+            elif x_off and not y_off:
+                edges[1] |= 1 << index
+            elif y_off and not x_off:
+                edges[2] |= 1 << index
+            # off both edges at once (beyond an acute corner) is left to nobody
+        masks.append((dx * size + dy, valid, edges))
+    return masks
+
+
+@lru_cache(maxsize=None)
+def _edge_templates(size):
+    """Bridges from second-row cells to their own edge.
+
+    Entry player (1 or 2) maps each cell to the (first, second) edge cells
+    carrying its bridge to that player's edges; entry player + 2 maps each
+    edge cell to the (stone, other edge cell) of every template it carries.
+    """
+    geo = geometry(size)
+    tables = {key: [[] for _ in range(geo.cells)] for key in (1, 2, 3, 4)}
+    if size < 3:
+        return tables
+    for player in (1, 2):
+        for edge_cells in geo.edge_cells[player]:
+            for index in range(geo.cells):
+                if index in edge_cells:
+                    continue
+                on_edge = [n for n in geo.adjacent[index] if n in edge_cells]
+                if len(on_edge) == 2 and on_edge[1] in geo.adjacent[on_edge[0]]:
+                    first, second = on_edge
+                    tables[player][index].append((first, second))
+                    tables[player + 2][first].append((index, second))
+                    tables[player + 2][second].append((index, first))
+    return tables
@@ -0,0 +1,228 @@
+import numpy as np
+from board import geometry
+
+
+class BatchEvaluator:
+    """Scores every child of a position in a handful of NumPy calls.
+
+    Siblings differ from their parent by one stone, so the parent's groups
+    are labelled once and every child is derived from them with array
+    operations over the move list: the moving player's stone merges the
+    groups around it (their sizes, liberties and edge contact combine), the
+    other player's groups only lose the cell as a liberty, and the edge
+    patterns change only where the stone lands.
+
+    custom_scores and largest_groups return exactly what evaluate_board
+    and heuristic of the two search agents compute for each child. stack
+    builds the children as a (moves, size, size) array for evaluators that
+    need the boards themselves, and wins says which of them are won.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        geo = geometry(size)
+        cells = geo.cells
+        self._cells = cells
+        # Neighbour table padded with a sentinel column (index cells) that
+        # is always empty and always labelled cells, above any real label.
+        self._neighbors = np.full((cells, 6), cells, dtype=np.intp)
+        self._adjacent = np.zeros((cells, cells), dtype=bool)
+        for index, adjacent in enumerate(geo.adjacent):
+            self._neighbors[index, :len(adjacent)] = adjacent
+            self._adjacent[index, list(adjacent)] = True
+        self._index = np.arange(cells + 1)
+
+        self._on_edge = {}
+        self._edge_cells = {}
+        self._diagonals = {}
+        self._edge_gain = {}
+        for player in (1, 2):
+            start, end = (np.array(sorted(cells_), dtype=np.intp) for cells_ in geo.edge_cells[player])
+            on_start = np.zeros(cells, dtype=bool)
+            on_end = np.zeros(cells, dtype=bool)
+            on_start[start] = True
+            on_end[end] = True
+            self._on_edge[player] = (on_start, on_end)
+            self._edge_cells[player] = np.concatenate([start, end])
+            pairs = self._diagonal_pairs(player)
+            self._diagonals[player] = np.array(pairs, dtype=np.intp).reshape(-1, 2)
+            # Per cell: how often it counts as an edge stone, and the other
+            # cell of every diagonal pair it belongs to (padded with the
+            # sentinel)
+            counts = np.bincount(self._edge_cells[player], minlength=cells)
+            partners = [[] for _ in range(cells)]
+            for a, b in pairs:
+                partners[a].append(b)
+                partners[b].append(a)
+            table = np.full((cells, max(map(len, partners), default=0) or 1), cells, dtype=np.intp)
+            for index, cell_partners in enumerate(partners):
+                table[index, :len(cell_partners)] = cell_partners
+            self._edge_gain[player] = (counts, table)
+
+    def _diagonal_pairs(self, player):
+        """The (edge cell, diagonal cell) pairs CustomPlayer.edge_connectivity rewards"""
+        size = self.size
+        pairs = []
+        for y in range(size):
+            for i in range(1, min(size, 4)):
+                if y + i < size:
+                    if player == 1:
+                        pairs.append((y, i * size + y + i))
+                    else:
+                        pairs.append((y * size, (y + i) * size + i))
+        for y in range(size):
+            for i in range(1, min(size, 4)):
+                if y - i >= 0:
+                    if player == 1:
+                        pairs.append(((size - 1) * size + y, (size - 1 - i) * size + y - i))
+                    else:
+                        pairs.append((y * size + size - 1, (y - i) * size + size - 1 - i))
+        return pairs
+
+    def stack(self, board, moves, player):
+        """(len(moves), size, size) int8 array of board with each move played by player"""
+        parent = np.array(board._cells, dtype=np.int8)
+        boards = np.tile(parent, (len(moves), 1))
+        size = self.size
+        boards[np.arange(len(moves)), [x * size + y for x, y in moves]] = player
+        return boards.reshape(len(moves), size, size)
+
+    def _groups(self, board, player, liberties=True):
+        """Labels, sizes, liberties and edge contact of player's groups on one board.
+
+        A single board is labelled faster by a flood fill in Python than by
+        array rounds. With liberties=False only the totals are computed.
+        """
+        cells = self._cells
+        owners = board._cells
+        adjacent = board._geometry.adjacent
+        labels = [cells] * (cells + 1)
+        for index, owner in enumerate(owners):
+            if owner == player and labels[index] == cells:
+                # Cells are visited in index order, so index is the group's lowest
+                labels[index] = index
+                frontier = [index]
+                for current in frontier:
+                    for neighbor in adjacent[current]:
+                        if owners[neighbor] == player and labels[neighbor] == cells:
+                            labels[neighbor] = index
+                            frontier.append(neighbor)
+        labels = np.array(labels, dtype=np.intp)
+        sizes = np.bincount(labels, minlength=cells + 1)
+        sizes[-1] = 0  # the sentinel is not a group
+        empty = np.array(owners, dtype=np.int8) == 0
+        # Every empty cell is a liberty of each distinct group around it
+        around = np.sort(labels[self._neighbors], axis=1)
+        around[:, 1:][around[:, 1:] == around[:, :-1]] = cells
+        around[~empty] = cells
+        groups = {
+            "labels": labels,
+            "sizes": sizes,
+            "squares": int((sizes * sizes).sum()),
+            "total_liberties": int((around != cells).sum()),
+        }
+        if liberties:
+            # liberties[g] marks the empty cells next to group g
+            table = np.zeros((cells + 1, cells), dtype=bool)
+            table[around.ravel(), np.repeat(np.arange(cells), 6)] = True
+            table[-1] = False
+            on_start, on_end = self._on_edge[player]
+            start = np.bincount(labels[:-1], weights=on_start, minlength=cells + 1) > 0
+            end = np.bincount(labels[:-1], weights=on_end, minlength=cells + 1) > 0
+            start[-1] = end[-1] = False
+            groups.update(liberties=table, liberty_counts=table.sum(axis=1), start=start, end=end,
+                          empty=empty)
+        return groups
+
+    def _around(self, groups, moves):
+        """Distinct group labels next to each move, duplicates replaced by the sentinel"""
+        around = np.sort(groups["labels"][self._neighbors[moves]], axis=1)
+        around[:, 1:][around[:, 1:] == around[:, :-1]] = self._cells
+        return around
+
+    def _merge(self, groups, moves, player):
+        """(wins, merged group size, sum of squared group sizes, liberty total) after each move"""
+        cells = self._cells
+        count = len(moves)
+        around = self._around(groups, moves)
+        real = around != cells
+        joined = groups["sizes"][around]
+        merged = 1 + joined.sum(axis=1)
+        squares = groups["squares"] - (joined * joined).sum(axis=1) + merged * merged
+
+        # Liberty total = sum over empty cells of the distinct groups next to
+        # each. The move's cell stops counting; every merged group's
+        # liberties (bar the move) are replaced by those of the new group.
+        union = groups["liberties"][around].any(axis=1) | (self._adjacent[moves] & groups["empty"])
+        union[np.arange(count), moves] = False
+        lost = ((groups["liberty_counts"][around] - 1) * real).sum(axis=1)
+        liberties = groups["total_liberties"] - real.sum(axis=1) + union.sum(axis=1) - lost
+
+        return self._wins(groups, around, moves, player), merged, squares, liberties
+
+    def _wins(self, groups, around, moves, player):
+        on_start, on_end = self._on_edge[player]
+        wins = ((groups["start"][around].any(axis=1) | on_start[moves])
+                & (groups["end"][around].any(axis=1) | on_end[moves]))
+        wins |= (groups["start"] & groups["end"]).any()  # already connected
+        return wins
+
+    def _edges(self, stones, player, moves=None):
+        """CustomPlayer.edge_connectivity: 10 per edge stone, 5 per diagonal extension.
+
+        stones is a flat boolean board with a trailing sentinel cell; with
+        moves, the score after each of them is played by player is returned.
+        """
+        pairs = self._diagonals[player]
+        edge = stones[self._edge_cells[player]].sum()
+        diagonal = (stones[pairs[:, 0]] & stones[pairs[:, 1]]).sum()
+        score = edge * 10 + diagonal * 5
+        if moves is None:
+            return score
+        counts, partners = self._edge_gain[player]
+        return score + counts[moves] * 10 + stones[partners[moves]].sum(axis=1) * 5
+
+    def _moves(self, moves):
+        size = self.size
+        return np.array([x * size + y for x, y in moves], dtype=np.intp)
+
+    def custom_scores(self, board, moves, mover, me):
+        """(wins, scores) for every child; wins says whether mover connected"""
+        indices = self._moves(moves)
+
+        # The mover's groups merge around the new stone
+        groups = self._groups(board, mover)
+        wins, _, squares, liberties = self._merge(groups, indices, mover)
+        connectivity = {mover: squares + 2 * liberties}
+        # The other player's groups only lose the cell as a liberty
+        other = self._groups(board, 3 - mover, liberties=False)
+        lost = (self._around(other, indices) != self._cells).sum(axis=1)
+        connectivity[3 - mover] = other["squares"] + 2 * (other["total_liberties"] - lost)
+
+        owners = np.zeros(self._cells + 1, dtype=np.int8)
+        owners[:-1] = board._cells
+        edges = {mover: self._edges(owners == mover, mover, indices),
+                 3 - mover: np.full(len(moves), self._edges(owners == 3 - mover, 3 - mover))}
+        scores = {}
+        for player in (1, 2):
+            scores[player] = (connectivity[player].astype(float), edges[player].astype(float))
+        (mine, my_edge), (theirs, their_edge) = scores[me], scores[3 - me]
+        return wins, (mine * 1.0 + my_edge * 2.0) - (theirs * 1.2 + their_edge * 2.2)
+
+    def wins(self, board, moves, mover):
+        """Whether mover connects with each move, for evaluators that score the boards from stack"""
+        indices = self._moves(moves)
+        groups = self._groups(board, mover)
+        return self._wins(groups, self._around(groups, indices), indices, mover)
+
+    def largest_groups(self, board, moves, mover, me):
+        """(wins, size of me's largest group) for every child"""
+        indices = self._moves(moves)
+        groups = self._groups(board, mover)
+        wins, merged, _, _ = self._merge(groups, indices, mover)
+        if me == mover:
+            largest = np.maximum(merged, groups["sizes"].max())
+        else:
+            # The opponent's stone leaves me's groups as they were
+            largest = np.full(len(moves), self._groups(board, me, liberties=False)["sizes"].max())
+        return wins, largest
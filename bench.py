@@ -0,0 +1,460 @@
+import argparse
+import copy
+import json
+import platform
+import random
+import sys
+import timeit
+import time
+import numpy as np
+from agent import Agent
+from agent1 import CustomPlayer
+from agent2 import MinimaxPlayer
+from agent3 import MCTSPlayer
+from evaluation import ResistanceEvaluator
+from grid import Grid
+from network import NetworkEvaluator, init_weights
+from search import TimeManager
+from solver import ProofNumberSolver
+
+PLAYER_CLASSES = {"Agent": CustomPlayer, "minimax": MinimaxPlayer, "mcts": MCTSPlayer}
+
+
+class NumpyAgent:
+    """The original float64 NumPy board layout, kept as a benchmark reference"""
+
+    def __init__(self, size):
+        self.size = size
+        self._grid = np.zeros(shape=(self.size, self.size))
+
+    def set_hex(self, player, coordinate):
+        self._grid[coordinate[1], coordinate[0]] = player
+
+    def get_hex(self, coordinate):
+        return self._grid[coordinate[1], coordinate[0]]
+
+    def neighbors(self, coordinates):
+        neighbors = []
+        directions = [[0, -1], [1, -1], [1, 0], [0, 1], [-1, 1], [-1, 0]]
+        for dir in directions:
+            new_coordinates = [coordinates[0]+dir[0], coordinates[1]+dir[1]]
+            if 0 <= new_coordinates[0] < self.size and 0 <= new_coordinates[1] < self.size:
+                neighbors.append(new_coordinates)
+        return neighbors
+
+    def check_win(self, player):
+        if player == 1:
+            start = [[0, y] for y in range(self.size) if self.get_hex([0, y]) == player]
+            axis = 0
+        else:
+            start = [[x, 0] for x in range(self.size) if self.get_hex([x, 0]) == player]
+            axis = 1
+        # Iterative so that 21x21 boards do not hit the recursion limit
+        visited = set()
+        stack = [s for s in start]
+        while stack:
+            current = stack.pop()
+            if current[axis] == self.size - 1:
+                return True
+            visited.add(tuple(current))
+            for neighbor in self.neighbors(current):
+                if tuple(neighbor) not in visited and self.get_hex(neighbor) == player:
+                    stack.append(neighbor)
+        return False
+
+    def free_moves(self):
+        return [[x, y] for x in range(self.size) for y in range(self.size) if self.get_hex([x, y]) == 0]
+
+    def copy(self):
+        new_agent = NumpyAgent(self.size)
+        new_agent._grid = copy.deepcopy(self._grid)
+        return new_agent
+
+
+def random_position(board, fill, seed):
+    """Alternately place stones on a fraction of the cells of board"""
+    rng = random.Random(seed)
+    cells = [[x, y] for x in range(board.size) for y in range(board.size)]
+    rng.shuffle(cells)
+    for i, cell in enumerate(cells[:int(fill * len(cells))]):
+        board.set_hex(1 + i % 2, cell)
+    return board
+
+
+def search_position(cls, size, fill, seed):
+    """A seeded random position for a cls player to search, seated as the side to move.
+
+    Positions that are already won, or in which either side wins with one
+    stone, are redrawn: the players answer those by taking the win or
+    playing the block without searching.
+    """
+    rng = random.Random(seed)
+    while True:
+        board = random_position(Agent(size, 1, 2), fill, rng.getrandbits(32))
+        if board.check_win(1) or board.check_win(2):
+            continue
+        decided = False
+        for move in board.free_moves():
+            for player in (1, 2):
+                board.play(move, player)
+                decided = decided or board.check_win(player)
+                board.undo()
+        if decided:
+            continue
+        to_move = board.to_move()
+        player = cls(size, to_move, 3 - to_move)
+        for index, owner in enumerate(board._cells):
+            if owner:
+                player.set_hex(owner, list(board._geometry.coords[index]))
+        return player
+
+
+def time_call(function, repeat):
+    """Best-of-three seconds per call"""
+    return min(timeit.repeat(function, number=repeat, repeat=3)) / repeat
+
+
+def ops_per_sec(function, repeat=3):
+    """Calls per second, best of repeat runs each lasting at least 0.2 s"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(repeat=repeat, number=number))
+
+
+def bench_layout(sizes, fill=0.5, repeat=200, seed=0):
+    """Compare the bitboard Agent against the NumPy layout per operation"""
+    operations = ["get_hex", "set_hex", "check_win", "free_moves", "copy"]
+    rows = []
+    for size in sizes:
+        boards = {
+            "numpy": random_position(NumpyAgent(size), fill, seed),
+            "bitboard": random_position(Agent(size, 1, 2), fill, seed),
+        }
+        cells = [[x, y] for x in range(size) for y in range(size)]
+        for operation in operations:
+            timings = {}
+            for layout, board in boards.items():
+                if operation == "get_hex":
+                    call = lambda: [board.get_hex(c) for c in cells]
+                elif operation == "set_hex":
+                    call = lambda: [board.set_hex(board.get_hex(c), c) for c in cells]
+                elif operation == "check_win":
+                    call = lambda: board.check_win(1) or board.check_win(2)
+                elif operation == "free_moves":
+                    call = board.free_moves
+                else:
+                    call = board.copy
+                timings[layout] = time_call(call, repeat)
+            rows.append((size, operation, timings["numpy"], timings["bitboard"]))
+    return rows
+
+
+def print_layout(rows):
+    print(f"{'size':>4} {'operation':<11} {'numpy us':>10} {'bitboard us':>12} {'speed-up':>9}")
+    for size, operation, numpy_time, bit_time in rows:
+        print(f"{size:>4} {operation:<11} {numpy_time * 1e6:>10.1f} {bit_time * 1e6:>12.1f} "
+              f"{numpy_time / bit_time:>8.1f}x")
+
+
+def bench_neighbors(sizes, repeat=200):
+    """Per-call cost of neighbors(): rebuilt on every call vs the shared table"""
+    rows = []
+    for size in sizes:
+        cells = [[x, y] for x in range(size) for y in range(size)]
+        before = NumpyAgent(size)
+        after = Agent(size, 1, 2)
+        adjacent = after._geometry.adjacent
+        calls = len(cells)
+        rows.append((size,
+                     time_call(lambda: [before.neighbors(c) for c in cells], repeat) / calls,
+                     time_call(lambda: [after.neighbors(c) for c in cells], repeat) / calls,
+                     time_call(lambda: [adjacent[i] for i in range(calls)], repeat) / calls))
+    return rows
+
+
+def print_neighbors(rows):
+    print(f"{'size':>4} {'rebuilt ns':>11} {'cached ns':>10} {'flat index ns':>14}")
+    for size, before, after, flat in rows:
+        print(f"{size:>4} {before * 1e9:>11.0f} {after * 1e9:>10.0f} {flat * 1e9:>14.0f}")
+
+
+def bench_tt(player_type, size, moves):
+    """Play a self-play game and search every position with and without the TT.
+
+    The live players keep their tables from move to move, exactly as in a
+    game; each position is also searched by a fresh player with tt=None.
+    """
+    cls = PLAYER_CLASSES[player_type]
+    players = {1: cls(size, 1, 2), 2: cls(size, 2, 1)}
+    history = []
+    rows = []
+    current = 1
+    while len(history) < moves:
+        reference = cls(size, current, 3 - current)
+        reference.tt = None
+        for player, move in history:
+            reference.set_hex(player, move)
+        start = time.perf_counter()
+        reference.step()
+        plain_time = time.perf_counter() - start
+
+        live = players[current]
+        start = time.perf_counter()
+        move = live.step()
+        tt_time = time.perf_counter() - start
+        players[3 - current].update(move)
+        history.append((current, move))
+
+        plain, stats = reference.search_stats, live.search_stats
+        rows.append((len(history), plain["nodes"], stats["nodes"], stats.get("tt_hit_rate", 0.0),
+                     plain_time, tt_time))
+        if live.check_win(current):
+            break
+        current = 3 - current
+    return rows
+
+
+def print_tt(rows):
+    print(f"{'move':>4} {'nodes':>9} {'nodes+tt':>9} {'saved':>7} {'hit rate':>9} {'time':>7} {'time+tt':>8}")
+    for move, plain, nodes, hit_rate, plain_time, tt_time in rows:
+        saved = 1 - nodes / plain if plain else 0.0
+        print(f"{move:>4} {plain:>9} {nodes:>9} {saved:>7.1%} {hit_rate:>9.1%} "
+              f"{plain_time:>6.2f}s {tt_time:>7.2f}s")
+
+
+def bench_eval(sizes, fill=0.3, repeat=20, seed=0):
+    """Time CustomPlayer's formula against the resistance evaluator per call"""
+    rows = []
+    for size in sizes:
+        player = random_position(CustomPlayer(size, 1, 2), fill, seed)
+        formula = time_call(lambda: player.evaluate_board(player), repeat)
+        evaluator = ResistanceEvaluator(size)
+        resistance = time_call(lambda: evaluator.evaluate(player, 1), repeat)
+        rows.append((size, formula, resistance))
+    return rows
+
+
+def print_eval(rows):
+    print(f"{'size':>4} {'formula ms':>11} {'resistance ms':>14}")
+    for size, formula, resistance in rows:
+        print(f"{size:>4} {formula * 1e3:>11.2f} {resistance * 1e3:>14.2f}")
+
+
+def bench_network(size, batches, weights=None, channels=32, layers=4, fill=0.3, seed=0):
+    """Positions per second through NetworkEvaluator.evaluate_batch at each batch size.
+
+    Each batch holds distinct seeded random positions. Without a weights
+    file the network is freshly initialised with channels and layers,
+    which costs the same as trained weights of that shape.
+    """
+    if weights is None:
+        network = NetworkEvaluator(init_weights(channels, layers, seed))
+    else:
+        network = NetworkEvaluator.load(weights)
+    rows = []
+    for batch in batches:
+        cells = np.array([random_position(Agent(size, 1, 2), fill, seed + i)._cells for i in range(batch)],
+                         dtype=np.int8)
+        rate = ops_per_sec(lambda: network.evaluate_batch(cells, 1, 1))
+        rows.append((batch, rate * batch, 1e6 / (rate * batch)))
+    return rows
+
+
+def print_network(rows):
+    print(f"{'batch':>5} {'positions/s':>12} {'us/position':>12}")
+    for batch, rate, latency in rows:
+        print(f"{batch:>5} {rate:>12,.0f} {latency:>12.1f}")
+
+
+def bench_solve(size, empties, positions=10, seed=0, time_limit=10.0):
+    """Solve random positions with a given number of empty cells.
+
+    Returns (empty cells, solved, mean nodes, mean proven nodes, mean
+    seconds) per entry of empties; positions already won are skipped and
+    every position gets a fresh solver so no proofs are shared.
+    """
+    rows = []
+    for count in empties:
+        solved = nodes = proven = 0
+        elapsed = 0.0
+        for i in range(positions):
+            rng = random.Random(seed + i)
+            while True:
+                board = Agent(size, 1, 2)
+                cells = [[x, y] for x in range(size) for y in range(size)]
+                rng.shuffle(cells)
+                for j, cell in enumerate(cells[:len(cells) - count]):
+                    board.set_hex(1 + j % 2, cell)
+                if not (board.check_win(1) or board.check_win(2)):
+                    break
+            solver = ProofNumberSolver(size, max_nodes=float("inf"))
+            result, _ = solver.solve(board, board.to_move(), time_limit)
+            solved += result is not None
+            nodes += solver.nodes
+            proven += solver.proven
+            elapsed += solver.elapsed
+        rows.append((count, solved / positions, nodes / positions, proven / positions, elapsed / positions))
+    return rows
+
+
+def print_solve(rows):
+    print(f"{'empty':>5} {'solved':>7} {'nodes':>9} {'proven':>8} {'seconds':>8}")
+    for count, solved, nodes, proven, elapsed in rows:
+        print(f"{count:>5} {solved:>7.0%} {nodes:>9.0f} {proven:>8.0f} {elapsed:>8.2f}")
+
+
+def bench_suite(sizes, fill=0.3, seed=0, positions=3, move_time=0.5):
+    """Ops/sec of the engine primitives and nodes/sec of each player's step().
+
+    Returns {"<benchmark>@<size>": {"metric": ..., "value": ...}}. Every
+    position is seeded, and step() searches with a fixed move_time, so runs
+    on the same machine are comparable. step() is timed on positions from
+    search_position, which the players can only answer by searching.
+    """
+    results = {}
+    for size in sizes:
+        board = random_position(Agent(size, 1, 2), fill, seed)
+        grid = Grid(size)
+        for coordinate in [[x, y] for x in range(size) for y in range(size)]:
+            grid.set_hex(board.get_hex(coordinate), coordinate)
+        minimax = random_position(MinimaxPlayer(size, 1, 2), fill, seed)
+        custom = random_position(CustomPlayer(size, 1, 2), fill, seed)
+        cells = [[x, y] for x in range(size) for y in range(size)]
+        primitives = {
+            "Grid.check_win": lambda: grid.check_win(1) or grid.check_win(2),
+            "Agent.check_win": lambda: board.check_win(1) or board.check_win(2),
+            "Agent.free_moves": board.free_moves,
+            "Agent.copy": board.copy,
+            "Agent.neighbors": lambda: [board.neighbors(c) for c in cells],
+            "MinimaxPlayer.heuristic": lambda: minimax.heuristic(minimax),
+            "CustomPlayer.evaluate_board": lambda: custom.evaluate_board(custom),
+        }
+        for name, call in primitives.items():
+            rate = ops_per_sec(call)
+            if name == "Agent.neighbors":
+                rate *= len(cells)  # per cell, not per sweep over the board
+            results[f"{name}@{size}"] = {"metric": "ops/sec", "value": rate}
+
+        for player_type, cls in PLAYER_CLASSES.items():
+            nodes = 0
+            elapsed = 0.0
+            for i in range(positions):
+                player = search_position(cls, size, fill, seed + i)
+                player.book = None
+                player.solver = None  # time the search, not the endgame solver
+                player.clock = TimeManager(move_time=move_time)
+                start = time.perf_counter()
+                player.step()
+                elapsed += time.perf_counter() - start
+                stats = player.search_stats
+                nodes += stats["nodes"] if "nodes" in stats else stats["playouts"]
+            results[f"{player_type}.step@{size}"] = {"metric": "nodes/sec", "value": nodes / elapsed}
+    return results
+
+
+def compare_suite(results, baseline, threshold):
+    """(name, baseline, current, change) for benchmarks slower than baseline by more than threshold"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None or not before["value"]:
+            continue
+        change = result["value"] / before["value"] - 1
+        if change < -threshold:
+            regressions.append((name, before["value"], result["value"], change))
+    return regressions
+
+
+def print_suite(results, baseline=None):
+    baseline = baseline or {}
+    print(f"{'benchmark':<34} {'metric':>9} {'value':>13} {'baseline':>13} {'change':>8}")
+    for name, result in results.items():
+        line = f"{name:<34} {result['metric']:>9} {result['value']:>13,.0f}"
+        before = baseline.get(name)
+        if before is not None and before["value"]:
+            line += f" {before['value']:>13,.0f} {result['value'] / before['value'] - 1:>+8.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI-Rena engine benchmarks")
+    commands = parser.add_subparsers(dest="command")
+
+    layout = commands.add_parser("layout", help="Bitboard vs NumPy board layout")
+    layout.add_argument("--sizes", type=int, nargs="+", default=list(range(5, 22, 2)), help="Board sizes")
+    layout.add_argument("--fill", type=float, default=0.5, help="Fraction of cells holding a stone")
+    layout.add_argument("--repeat", type=int, default=200, help="Calls per timing sample")
+
+    tt = commands.add_parser("tt", help="Per-move nodes and hit rate with and without the TT")
+    tt.add_argument("--player", choices=["Agent", "minimax"], default="Agent", help="Player type")
+    tt.add_argument("--size", type=int, default=9, help="Grid size")
+    tt.add_argument("--moves", type=int, default=20, help="Number of moves to play")
+    neighbors = commands.add_parser("neighbors", help="Per-call cost of neighbors()")
+    neighbors.add_argument("--sizes", type=int, nargs="+", default=[5, 9, 13, 21], help="Board sizes")
+
+    evaluation = commands.add_parser("eval", help="Per-call cost of the position evaluators")
+    evaluation.add_argument("--sizes", type=int, nargs="+", default=[5, 9, 13, 21], help="Board sizes")
+    evaluation.add_argument("--fill", type=float, default=0.3, help="Fraction of cells holding a stone")
+
+    network = commands.add_parser("network", help="Positions/sec of the NumPy network by batch size")
+    network.add_argument("--size", type=int, default=9, help="Grid size")
+    network.add_argument("--batches", type=int, nargs="+", default=[1, 16, 256], help="Batch sizes")
+    network.add_argument("--weights", help="Weights file (.npz); freshly initialised weights by default")
+    network.add_argument("--channels", type=int, default=32, help="Channels per convolution without --weights")
+    network.add_argument("--layers", type=int, default=4, help="Number of convolutions without --weights")
+    network.add_argument("--fill", type=float, default=0.3, help="Fraction of cells holding a stone")
+
+    solve = commands.add_parser("solve", help="Proof-number solver cost by number of empty cells")
+    solve.add_argument("--size", type=int, default=9, help="Grid size")
+    solve.add_argument("--empties", type=int, nargs="+", default=[16, 20, 24, 28, 32],
+                       help="Empty cells left in the random positions")
+    solve.add_argument("--positions", type=int, default=10, help="Positions per number of empty cells")
+    solve.add_argument("--time-limit", type=float, default=10.0, help="Seconds before a position counts as unsolved")
+
+    suite = commands.add_parser("suite", help="Ops/sec of the engine primitives and nodes/sec of step()")
+    suite.add_argument("--sizes", type=int, nargs="+", default=[5, 7, 9, 13, 21], help="Board sizes")
+    suite.add_argument("--fill", type=float, default=0.3, help="Fraction of cells holding a stone")
+    suite.add_argument("--seed", type=int, default=0, help="Seed for the random positions")
+    suite.add_argument("--move-time", type=float, default=0.5, help="Search seconds per step()")
+    suite.add_argument("--save", help="Write the results as a JSON baseline")
+    suite.add_argument("--baseline", help="JSON baseline to compare against")
+    suite.add_argument("--threshold", type=float, default=0.2,
+                       help="Slow-down against the baseline reported as a regression")
+    args = parser.parse_args()
+
+    if args.command == "suite":
+        results = bench_suite(args.sizes, args.fill, args.seed, move_time=args.move_time)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        print_suite(results, baseline)
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                           "fill": args.fill, "seed": args.seed, "move_time": args.move_time,
+                           "results": results}, f, indent=2)
+        if baseline is not None:
+            regressions = compare_suite(results, baseline, args.threshold)
+            for name, before, after, change in regressions:
+                print(f"REGRESSION {name}: {before:,.0f} -> {after:,.0f} ({change:+.1%})")
+            if regressions:
+                sys.exit(1)
+    elif args.command == "network":
+        print_network(bench_network(args.size, args.batches, args.weights, args.channels, args.layers,
+                                    args.fill))
+    elif args.command == "solve":
+        print_solve(bench_solve(args.size, args.empties, args.positions, time_limit=args.time_limit))
+    elif args.command == "neighbors":
+        print_neighbors(bench_neighbors(args.sizes))
+    elif args.command == "eval":
+        print_eval(bench_eval(args.sizes, args.fill))
+    elif args.command == "tt":
+        print_tt(bench_tt(args.player, args.size, args.moves))
+    elif args.command == "layout":
+        print_layout(bench_layout(args.sizes, args.fill, args.repeat))
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
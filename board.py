@@ -0,0 +1,115 @@
+import random
+from functools import lru_cache
+
+# Hex directions in cyclic order: consecutive ones are adjacent to each other
+DIRECTIONS = [(0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0)]
+
+
+class Geometry:
+    """Precomputed bitboard tables for one board size.
+
+    Cell (x, y) is bit x*size + y, so iterating bits from low to high visits
+    cells in the same x-major order that free_moves has always used.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+        self.bits = [1 << i for i in range(self.cells)]
+        self.coords = [(i // size, i % size) for i in range(self.cells)]
+
+        column = (1 << size) - 1
+        top = sum(1 << (x * size) for x in range(size))
+        bottom = top << (size - 1)
+        # Shifting along y must not wrap into the neighbouring column.
+        self.not_top = self.full & ~top
+        self.not_bottom = self.full & ~bottom
+
+        # Player 1 joins x=0 to x=size-1, player 2 joins y=0 to y=size-1.
+        self.edges = {
+            1: (column, column << (size * (size - 1))),
+            2: (top, bottom),
+        }
+
+        # Cells along each edge, as index sets
+        self.edge_cells = {player: tuple(frozenset(i for i in range(self.cells) if (mask >> i) & 1)
+                                         for mask in masks)
+                           for player, masks in self.edges.items()}
+
+        # Neighbouring cells (as indices and as (x, y) tuples, in the order
+        # neighbors() has always returned them), and the bridges each cell
+        # takes part in: two cells sharing two empty neighbours (the
+        # carrier) are virtually connected. carried[i] lists (end, end,
+        # other carrier) for every bridge in which cell i is a carrier.
+        self.adjacent = []
+        self.neighbor_coords = []
+        self.bridges = []
+        self.carried = [[] for _ in range(self.cells)]
+        for index, (x, y) in enumerate(self.coords):
+            self.adjacent.append(tuple(self._index_of(x + dx, y + dy) for dx, dy in DIRECTIONS
+                                       if self._index_of(x + dx, y + dy) is not None))
+            self.neighbor_coords.append(tuple(tuple(self.coords[n]) for n in self.adjacent[-1]))
+            bridges = []
+            for (ax, ay), (bx, by) in zip(DIRECTIONS, DIRECTIONS[1:] + DIRECTIONS[:1]):
+                partner = self._index_of(x + ax + bx, y + ay + by)
+                first = self._index_of(x + ax, y + ay)
+                second = self._index_of(x + bx, y + by)
+                if partner is not None and first is not None and second is not None:
+                    bridges.append((partner, first, second))
+                    if index < partner:
+                        self.carried[first].append((index, partner, second))
+                        self.carried[second].append((index, partner, first))
+            self.bridges.append(tuple(bridges))
+
+        # Zobrist keys per player and cell, seeded by size so that hashes
+        # agree across processes and runs (slot 0 stands for empty).
+        rng = random.Random(size)
+        self.zobrist = [[0] * self.cells] + [
+            [rng.getrandbits(64) for _ in range(self.cells)] for _ in (1, 2)]
+
+    def index(self, coordinate):
+        return coordinate[0] * self.size + coordinate[1]
+
+    def _index_of(self, x, y):
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return x * self.size + y
+        return None
+
+    def dilate(self, bits):
+        """Return bits together with every cell adjacent to one of them"""
+        size = self.size
+        up = bits & self.not_top
+        down = bits & self.not_bottom
+        return (bits | (bits << size) | (bits >> size)
+                | (up >> 1) | (up << (size - 1))
+                | (down << 1) | (down >> (size - 1))) & self.full
+
+    def connects(self, stones, player):
+        """Flood-fill stones from a player's first edge towards the second"""
+        start, end = self.edges[player]
+        reached = stones & start
+        while reached:
+            if reached & end:
+                return True
+            grown = self.dilate(reached) & stones
+            if grown == reached:
+                return False
+            reached = grown
+        return False
+
+    def cells_of(self, bits):
+        """List the [x, y] coordinates of the set bits, in index order"""
+        coords = self.coords
+        cells = []
+        while bits:
+            low = bits & -bits
+            x, y = coords[low.bit_length() - 1]
+            cells.append([x, y])
+            bits ^= low
+        return cells
+
+
+@lru_cache(maxsize=None)
+def geometry(size):
+    return Geometry(size)
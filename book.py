@@ -0,0 +1,240 @@
+import argparse
+import os
+import time
+import numpy as np
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.npz")
+
+
+class OpeningBook:
+    """Precomputed best moves for early positions, keyed by Zobrist hash.
+
+    The file holds, per board size, a sorted uint64 array of canonical
+    position keys (keys_<size>, see Agent.canonical_key) and the flat index
+    x*size + y of the move to play in each (moves_<size>), for the
+    canonical orientation. A position and its 180-degree rotation share one
+    entry. checked_<size> marks the entries the solver confirmed (see
+    verify); books without it count as unchecked. Nothing is read until
+    the first lookup, and a missing file simply means an empty book.
+    """
+
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        self._tables = None
+        self.lookups = 0
+        self.hits = 0
+
+    def _load(self):
+        self._tables = {}
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path) as data:
+            for name in data.files:
+                if name.startswith("keys_"):
+                    size = int(name[5:])
+                    keys = data[name]
+                    checked = (data["checked_" + name[5:]] if "checked_" + name[5:] in data.files
+                               else np.zeros(len(keys), dtype=bool))
+                    self._tables[size] = (keys, data["moves_" + name[5:]], checked)
+
+    def sizes(self):
+        if self._tables is None:
+            self._load()
+        return sorted(self._tables)
+
+    def lookup(self, board, checked=False):
+        """Book move [x, y] for board's position, or None; with checked, only solver-confirmed moves"""
+        if self._tables is None:
+            self._load()
+        self.lookups += 1
+        table = self._tables.get(board.size)
+        if table is None:
+            return None
+        keys, moves, confirmed = table
+        key, rotated = board.canonical_key()
+        key = np.uint64(key)
+        i = int(np.searchsorted(keys, key))
+        if i == len(keys) or keys[i] != key or (checked and not confirmed[i]):
+            return None
+        index = int(moves[i])
+        if rotated:
+            index = board.size * board.size - 1 - index
+        move = [index // board.size, index % board.size]
+        if not board.is_free(move):
+            return None  # a hash collision, not a position from the book
+        self.hits += 1
+        return move
+
+
+_default_book = None
+
+
+def default_book():
+    """The book shipped next to this module, shared by every player in the process"""
+    global _default_book
+    if _default_book is None:
+        _default_book = OpeningBook()
+    return _default_book
+
+
+def _walk(size, plies, choose):
+    """Every book position of a board size, with the book's move chosen by choose(board, to_move).
+
+    A book position is one with fewer than plies stones that the book
+    itself can lead to. The book's side plays its book move while every
+    reply of the other side is expanded, once with each colour as the
+    book's side. choose gets an Agent holding the position and returns the
+    flat move index for its canonical orientation, or None to end the line
+    there; positions are visited once per line that reaches them.
+    """
+    from agent import Agent
+
+    for book_side in (1, 2):
+        # Each frontier entry is the list of (player, move) that reaches it
+        frontier = [[]]
+        for ply in range(plies):
+            to_move = 1 + ply % 2
+            following = []
+            for line in frontier:
+                board = Agent(size, to_move, 3 - to_move)
+                for mover, move in line:
+                    board.set_hex(mover, move)
+                if to_move == book_side:
+                    index = choose(board, to_move)
+                    if index is None:
+                        continue
+                    if board.canonical_key()[1]:
+                        index = size * size - 1 - index
+                    following.append(line + [(to_move, [index // size, index % size])])
+                else:
+                    following.extend(line + [(to_move, move)] for move in board.free_moves())
+            frontier = following
+
+
+def generate(size, player_type, plies, move_time, seed=0):
+    """Search every book position of a board size; returns {key: flat move index}.
+
+    Player 1 opens in the centre, as CustomPlayer does without a book, so
+    the rest of the book follows the games it actually plays. A position
+    whose rotation was already searched takes the rotated move instead of
+    being searched again.
+    """
+    from agent1 import CustomPlayer
+    from agent2 import MinimaxPlayer
+    from agent3 import MCTSPlayer
+    from search import TimeManager
+
+    cls = {"Agent": CustomPlayer, "minimax": MinimaxPlayer, "mcts": MCTSPlayer}[player_type]
+    entries = {}
+
+    def search(board, to_move):
+        key, rotated = board.canonical_key()
+        if key not in entries:
+            np.random.seed(seed)
+            player = cls(size, to_move, 3 - to_move)
+            player.book = None
+            player.clock = TimeManager(move_time=move_time)
+            for index, owner in enumerate(board._cells):
+                if owner:
+                    player.set_hex(owner, [index // size, index % size])
+            move = player.step() if any(board._cells) else [size // 2, size // 2]
+            if rotated:
+                move = player.rotate(move)
+            entries[key] = move[0] * size + move[1]
+        return entries[key]
+
+    _walk(size, plies, search)
+    return entries
+
+
+def verify(size, entries, plies, time_limit):
+    """Check every book move of a board size with the solver; returns the set of checked keys.
+
+    A move is checked when the solver proves the position after it lost
+    for the opponent, or proves the position before it lost for the mover
+    (no move saves it). When the book move throws away a proven win, the
+    entry is replaced in entries by the solver's winning move, and the
+    positions after the old move are no longer walked. Positions the solver
+    cannot settle in time_limit seconds stay unchecked.
+    """
+    from solver import ProofNumberSolver
+
+    solver = ProofNumberSolver(size, max_nodes=float("inf"))
+    checked = set()
+
+    def check(board, to_move):
+        key, rotated = board.canonical_key()
+        if key not in entries:
+            return None  # only reachable through a move that was replaced
+        if key not in checked:
+            index = entries[key]
+            move = board.rotate(divmod(index, size)) if rotated else list(divmod(index, size))
+            board.play(move, to_move)
+            reply, _ = solver.solve(board, 3 - to_move, time_limit)
+            board.undo()
+            if reply is False:
+                checked.add(key)
+            elif reply is True:
+                result, win = solver.solve(board, to_move, time_limit)
+                if result:
+                    win = board.rotate(win) if rotated else win
+                    entries[key] = win[0] * size + win[1]
+                if result is not None:
+                    checked.add(key)
+        return entries[key]
+
+    _walk(size, plies, check)
+    return checked
+
+
+def save(path, tables, checked=None):
+    """Write {size: {key: move}} as sorted key and move arrays, with {size: checked keys} if given"""
+    arrays = {}
+    for size, entries in tables.items():
+        keys = np.array(sorted(entries), dtype=np.uint64)
+        arrays[f"keys_{size}"] = keys
+        arrays[f"moves_{size}"] = np.array([entries[int(k)] for k in keys], dtype=np.uint16)
+        confirmed = (checked or {}).get(size, set())
+        arrays[f"checked_{size}"] = np.array([int(k) in confirmed for k in keys], dtype=bool)
+    np.savez_compressed(path, **arrays)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book offline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(range(3, 10)), help="Board sizes")
+    parser.add_argument("--player", choices=["Agent", "minimax", "mcts"], default="mcts",
+                        help="Agent that searches the book positions")
+    parser.add_argument("--plies", type=int, default=3, help="Book positions have fewer stones than this")
+    parser.add_argument("--move-time", type=float, default=0.5, help="Search seconds per position")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the searching agent")
+    parser.add_argument("--solve-time", type=float, default=10.0,
+                        help="Solver seconds per position when checking the book (0 to skip the check)")
+    parser.add_argument("--check-only", action="store_true",
+                        help="Check and rewrite the existing book instead of searching a new one")
+    parser.add_argument("--output", default=BOOK_PATH, help="Book file to write")
+    args = parser.parse_args()
+
+    tables = {}
+    checked = {}
+    if args.check_only:
+        # Sizes not being checked are written back as they were
+        with np.load(args.output) as data:
+            for name in data.files:
+                if name.startswith("keys_"):
+                    size = int(name[5:])
+                    keys = data[name].tolist()
+                    tables[size] = dict(zip(keys, data[f"moves_{size}"].tolist()))
+                    if f"checked_{size}" in data.files:
+                        checked[size] = {k for k, c in zip(keys, data[f"checked_{size}"].tolist()) if c}
+    for size in args.sizes:
+        start = time.perf_counter()
+        if not args.check_only:
+            tables[size] = generate(size, args.player, args.plies, args.move_time, args.seed)
+        if args.solve_time > 0:
+            checked[size] = verify(size, tables[size], args.plies, args.solve_time)
+        print(f"{size}x{size}: {len(tables[size])} positions, {len(checked.get(size, ()))} checked by the "
+              f"solver in {time.perf_counter() - start:.1f}s")
+    save(args.output, tables, checked)
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,107 @@
+import time
 from grid import Grid
 
+
+class Forfeit(Exception):
+    """Raised by a player's step() when it loses without a move, e.g. a sandboxed agent over its limits"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
 class Controller:
-    def __init__(self, size, player1, player2):
+    def __init__(self, size, player1, player2, time_limit=90.0, tracer=None):
         self._grid = Grid(size)
         self._player1 = player1
         self._player2 = player2
         self._current_player = 1
         self._winner = 0
+        # Chess clock: seconds left per player, None for an untimed game
+        self._time_limit = time_limit
+        self._time_left = {1: time_limit, 2: time_limit}
+        self._lost_on_time = 0
+        # Why the loser forfeited ("time", "memory", "crashed", "protocol"), None otherwise
+        self._forfeit = None
+        # Coordinates of every move played, player 1's first
+        self._history = []
+        # Optional instrumentation.MoveTracer; None costs one check per move
+        self._tracer = tracer
+        if tracer is not None:
+            tracer.start_game(size, player1, player2, time_limit)
 
     def update(self):
         if self._current_player == 1:
-            coordinates = self._player1.step()
-            self._grid.set_hex(self._current_player, coordinates)
-            self._current_player = 2
-            self._player2.update(coordinates)
+            player, opponent = self._player1, self._player2
         else:
-            coordinates = self._player2.step()
-            self._grid.set_hex(self._current_player, coordinates)
-            self._current_player = 1
-            self._player1.update(coordinates)
+            player, opponent = self._player2, self._player1
+
+        player.time_left = self._time_left[self._current_player]
+        tracer = self._tracer
+        if tracer is not None:
+            tracer.start_move(len(self._history) + 1, self._current_player)
+        start = time.perf_counter()
+        try:
+            coordinates = player.step()
+        except Forfeit as forfeit:
+            self._forfeit = forfeit.reason
+            if forfeit.reason == "time":
+                self._lost_on_time = self._current_player
+            self._winner = 3 - self._current_player
+            if tracer is not None:
+                tracer.forfeit(self._current_player, forfeit.reason)
+            self._end_game()
+            return
+        elapsed = time.perf_counter() - start
+        if tracer is not None:
+            tracer.end_step(player, coordinates)
+
+        if self._time_limit is not None:
+            self._time_left[self._current_player] -= elapsed
+            if self._time_left[self._current_player] < 0:
+                # Flag fall: the move is void and the opponent wins
+                self._lost_on_time = self._current_player
+                self._winner = 3 - self._current_player
+                if tracer is not None:
+                    tracer.lost_on_time(self._current_player)
+                self._end_game()
+                return
 
+        mover = self._current_player
+        self._grid.set_hex(self._current_player, coordinates)
+        self._history.append(list(coordinates))
+        self._current_player = 3 - self._current_player
+        opponent.update(coordinates)
+
+        self._check_win()
+        if tracer is not None:
+            tracer.end_move(self._time_left[mover], self._winner)
+        if self._winner:
+            self._end_game()
+
+    def play_forced(self, coordinates):
+        """Play a move for the player to move without asking them, e.g. from a random opening"""
+        mover = self._current_player
+        self._grid.set_hex(mover, coordinates)
+        self._history.append(list(coordinates))
+        self._player1.set_hex(mover, coordinates)
+        self._player2.set_hex(mover, coordinates)
+        self._current_player = 3 - mover
         self._check_win()
 
+    def last_move(self):
+        """Coordinates of the most recent move, or None before the first"""
+        return self._history[-1] if self._history else None
+
+    def time_left(self, player):
+        return self._time_left[player]
+
     def _check_win(self):
         if self._grid.check_win(1):
             self._winner = 1
         elif self._grid.check_win(2):
             self._winner = 2
+
+    def _end_game(self):
+        self._player1.end_game(self._winner)
+        self._player2.end_game(self._winner)
@@ -0,0 +1,119 @@
+import numpy as np
+from scipy.linalg import solveh_banded
+from scipy.sparse import csr_matrix
+from board import geometry
+
+
+class Evaluator:
+    """What the search agents ask of a pluggable position evaluator.
+
+    Scores are from player's point of view, positive when player is
+    ahead, and must stay well inside the agents' win scores. Besides single
+    boards, evaluators are handed batches of flat boards: an int8 array with
+    one row per position and cells indexed x*size + y, as
+    BatchEvaluator.stack builds them, together with the player to move in
+    all of them. The default implementations fall back on each other, so a
+    subclass provides evaluate, evaluate_batch or both; priors is optional.
+    symmetric says whether a position and its 180-degree rotation always
+    score the same; only then may the agents' tables share their entries.
+    """
+
+    symmetric = False
+
+    def evaluate(self, board, player):
+        cells = np.array(board._cells, dtype=np.int8)[None]
+        return float(self.evaluate_batch(cells, player, board.to_move())[0])
+
+    def evaluate_batch(self, cells, player, to_move):
+        return np.array([self.evaluate_cells(row, player, to_move) for row in cells])
+
+    def evaluate_cells(self, cells, player, to_move):
+        """Score one flat board"""
+        raise NotImplementedError
+
+    def priors(self, board, player):
+        """Probability per flat cell index that player should play there, or None without a policy"""
+        return None
+
+
+class ResistanceEvaluator(Evaluator):
+    """Scores a position by treating each player's connection as a circuit.
+
+    Every cell is a node and adjacent cells are joined by a resistor of
+    r(a) + r(b), where r is near zero for the player's own stones, 1 for
+    empty cells and huge for the opponent's stones. Each of the player's
+    two edges is a terminal wired to the cells along it. The effective
+    resistance between the terminals is small when the player is close to
+    connecting, so log(R_opponent / R_player) is the evaluation.
+
+    With cells numbered x*size + y, every resistor joins cells at most
+    size apart, so the reduced Laplacian is a symmetric band matrix. Only
+    conductances change between positions: the sparse map from resistor
+    conductances to the band storage is built once per board size, and
+    each position costs one scatter and one banded Cholesky solve.
+    """
+
+    # The rotation maps each player's edges onto each other and keeps every resistor
+    symmetric = True
+
+    def __init__(self, size, own=1e-3, blocked=1e6, scale=10.0):
+        self.size = size
+        self.own = own
+        self.blocked = blocked
+        self.scale = scale
+
+        geo = geometry(size)
+        cells = geo.cells
+        pairs = []
+        for index, (x, y) in enumerate(geo.coords):
+            for dx, dy in ((1, -1), (1, 0), (0, 1)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    pairs.append((index, nx * size + ny))
+        pairs = np.array(pairs, dtype=int).reshape(-1, 2)
+        self._a, self._b = pairs[:, 0], pairs[:, 1]
+        edges = len(pairs)
+
+        # Conductance vector layout: [cell-cell resistors, source wires,
+        # sink wires]. A resistor adds to the diagonal entry of both its
+        # ends and subtracts from the entry between them; the terminals are
+        # held at fixed voltages, so their wires only touch the diagonal.
+        arange = np.arange(cells)
+        rows = np.concatenate([self._a, self._b, np.minimum(self._a, self._b), arange, arange])
+        cols = np.concatenate([self._a, self._b, np.maximum(self._a, self._b), arange, arange])
+        signs = np.concatenate([np.ones(2 * edges), -np.ones(edges), np.ones(2 * cells)])
+        terms = np.concatenate([np.arange(edges)] * 3 + [edges + arange, edges + cells + arange])
+        # Upper band storage as used by LAPACK: entry (i, j), i <= j, lives
+        # at [bandwidth + i - j, j].
+        self._bandwidth = max(size, 2)  # LAPACK treats a bandwidth of 1 as tridiagonal
+        self._scatter = csr_matrix((signs, ((self._bandwidth + rows - cols) * cells + cols, terms)),
+                                   shape=((self._bandwidth + 1) * cells, edges + 2 * cells))
+
+        self._terminals = {}
+        for player in (1, 2):
+            start, end = geo.edges[player]
+            self._terminals[player] = (
+                np.array([(start >> i) & 1 for i in range(cells)], dtype=float),
+                np.array([(end >> i) & 1 for i in range(cells)], dtype=float),
+            )
+
+    def resistance(self, cells, player):
+        """Effective resistance between player's edges; cells is flat, index x*size + y"""
+        r = np.where(cells == player, self.own, np.where(cells == 0, 1.0, self.blocked))
+        source, sink = self._terminals[player]
+        source = source / r
+        conductances = np.concatenate([1.0 / (r[self._a] + r[self._b]), source, sink / r])
+        band = (self._scatter @ conductances).reshape(self._bandwidth + 1, len(cells))
+        # Source terminal held at 1 V, sink at 0 V
+        voltages = solveh_banded(band, source, check_finite=False)
+        current = np.dot(source, 1.0 - voltages)
+        return 1.0 / current
+
+    def evaluate(self, board, player):
+        """Positive when player is closer to connecting than the opponent"""
+        return self.evaluate_cells(board.to_array().T.ravel(), player, None)
+
+    def evaluate_cells(self, cells, player, to_move):
+        mine = self.resistance(cells, player)
+        theirs = self.resistance(cells, 3 - player)
+        return self.scale * np.log(theirs / mine)
@@ -1,52 +1,101 @@
 import numpy as np
+from board import geometry
 
 class Grid:
     def __init__(self, size):
         self._size = size
-        self._grid = np.zeros(shape=(self._size, self._size))
+        self._geometry = geometry(size)
+        self._stones = [0, 0, 0]
+        # Per-cell mirror of the bitboards so single-cell reads stay cheap
+        self._cells = [0] * (size * size)
+        self._reset_sets()
 
     def get_size(self):
         return self._size
 
     def set_hex(self, player, coordinate):
-        self._grid[coordinate[1], coordinate[0]] = player
+        index = coordinate[0] * self._size + coordinate[1]
+        previous = self._cells[index]
+        bit = self._geometry.bits[index]
+        if previous:
+            self._stones[previous] ^= bit
+        if player:
+            self._stones[player] |= bit
+        self._cells[index] = player
+        if previous == 0 and player != 0:
+            self._join(player, coordinate)
+        elif previous != player:
+            # Disjoint sets cannot split, so a cleared or overwritten cell
+            # means rebuilding them from the stones on the board.
+            self._rebuild_sets()
 
     def get_hex(self, coordinate):
-        return self._grid[coordinate[1], coordinate[0]]
+        return self._cells[coordinate[0] * self._size + coordinate[1]]
 
     def neighbors(self, coordinates):
-        neighbors = []
-        directions = [[0, -1], [1, -1], [1, 0], [0, 1], [-1, 1], [-1, 0]]
-        for dir in directions:
-            new_coordinates = [coordinates[0]+dir[0], coordinates[1]+dir[1]]
-            if 0 <= new_coordinates[0] < self._size and 0 <= new_coordinates[1] < self._size:
-                neighbors.append(new_coordinates)
-        return neighbors
+        # Built from the shared per-size table, so callers may modify the result
+        return [[x, y] for x, y in self._geometry.neighbor_coords[coordinates[0] * self._size + coordinates[1]]]
 
     def check_win(self, player):
-        if player == 1:
-            start = [[0, y] for y in range(self._size) if self.get_hex([0, y]) == player]
-            end = self._size - 1
-            axis = 0
-        else:
-            start = [[x, 0] for x in range(self._size) if self.get_hex([x,0]) == player ]
-            end = self._size - 1
-            axis = 1
-
-        for s in start:
-            if self._dfs(s, player, end, axis, set()):
-                    return True
-        return False
-
-    def _dfs(self, current, player, end, axis, visited):
-        if current[axis] == end:
-            return True
-        visited.add(tuple(current))
-        for neighbor in self.neighbors(current):
-            if tuple(neighbor) not in visited and self.get_hex(neighbor) == player:
-                if self._dfs(neighbor, player, end, axis, visited):
-                    return True
-        return False
+        # Player 1 joins x=0 to x=size-1, player 2 joins y=0 to y=size-1.
+        # Each edge is a virtual node in the disjoint-set forest, so a win
+        # is just both edges of a player sharing a root.
+        start, end = self._edge_nodes(player)
+        return self._find(start) == self._find(end)
 
     def free_moves(self):
-        return [[x, y] for x in range(self._size) for y in range(self._size) if self.get_hex([x, y]) == 0]
+        geo = self._geometry
+        return geo.cells_of(geo.full & ~(self._stones[1] | self._stones[2]))
+
+    def to_array(self):
+        # _cells is indexed x*size + y, i.e. an [x, y] array once reshaped
+        return np.array(self._cells, dtype=float).reshape(self._size, self._size).T
+
+    def _edge_nodes(self, player):
+        cells = self._size * self._size
+        if player == 1:
+            return cells, cells + 1
+        return cells + 2, cells + 3
+
+    def _reset_sets(self):
+        # One node per cell (index x*size + y) plus four virtual edge nodes.
+        count = self._size * self._size + 4
+        self._parent = list(range(count))
+        self._rank = [0] * count
+
+    def _rebuild_sets(self):
+        self._reset_sets()
+        for player in (1, 2):
+            for coordinate in self._geometry.cells_of(self._stones[player]):
+                self._join(player, coordinate)
+
+    def _join(self, player, coordinate):
+        node = coordinate[0] * self._size + coordinate[1]
+        for neighbor in self._geometry.adjacent[node]:
+            if self._cells[neighbor] == player:
+                self._union(node, neighbor)
+
+        start, end = self._edge_nodes(player)
+        start_cells, end_cells = self._geometry.edge_cells[player]
+        if node in start_cells:
+            self._union(node, start)
+        if node in end_cells:
+            self._union(node, end)
+
+    def _find(self, node):
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, a, b):
+        a = self._find(a)
+        b = self._find(b)
+        if a == b:
+            return
+        if self._rank[a] < self._rank[b]:
+            a, b = b, a
+        self._parent[b] = a
+        if self._rank[a] == self._rank[b]:
+            self._rank[a] += 1
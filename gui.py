@@ -1,3 +1,4 @@
+import threading
 import tkinter as tk
 import numpy as np
 from tkinter import font
@@ -110,6 +111,14 @@ class GUI:
         
         self.stop = False
         self.launch = False
+        self.move_delay = 10  # ms between one move being drawn and the next starting
+        self._poll_interval = 20  # ms between checks whether step() has returned
+        self._worker = None
+        self._moves_drawn = 0
+        # Unit hexagon corners, scaled and translated for every cell once
+        angles = np.radians(60 * np.arange(6) - 30)
+        self._corners = np.column_stack([np.cos(angles), np.sin(angles)]) * hex_size
+        self._items = {}
         self._draw()
         self._update_turn_label()
 
@@ -127,23 +136,51 @@ class GUI:
         self._turn_label.config(text=f"Player {current}'s Turn", fg=color)
 
     def run(self):
-        while not self.stop:
-            if self.launch:
-                self._controller.update()
-                self._draw()
-                self._update_turn_label()
-                self._screen.update()
-                self.check_win()
-            else:
-                self._screen.update()
+        # Tk's event loop sleeps until something happens; moves are driven
+        # by after() callbacks instead of a busy loop.
+        self._screen.mainloop()
+
+    def _next_move(self):
+        if self.stop or not self.launch or self._controller._winner != 0:
+            return
+        # step() runs on a worker thread so the window keeps responding while
+        # an agent thinks; only this (Tk) thread touches the widgets.
+        self._worker = threading.Thread(target=self._controller.update, daemon=True)
+        self._worker.start()
+        self._screen.after(self._poll_interval, self._wait_for_move)
+
+    def _wait_for_move(self):
+        if self.stop:
+            return
+        if self._worker.is_alive():
+            self._screen.after(self._poll_interval, self._wait_for_move)
+            return
+        self._worker = None
+        move = self._controller.last_move()
+        if len(self._controller._history) > self._moves_drawn and move is not None:
+            self._moves_drawn = len(self._controller._history)
+            self._recolor(move, self._grid.get_hex(move))
+        self._update_turn_label()
+        self.check_win()
+        if self.launch:
+            self._screen.after(self.move_delay, self._next_move)
 
     def check_win(self):
         if self._controller._winner != 0:
             self.launch = False
             self._show_winner()
 
+    def _colors(self, player):
+        if player == 1:
+            return self._p1_color, self._p1_dark
+        if player == 2:
+            return self._p2_color, self._p2_dark
+        return '#ECF0F1', '#BDC3C7'  # Empty cell
+
     def _draw(self):
+        """Create the canvas items for every cell; later moves only recolor them"""
         self._grid_canvas.delete("all")
+        self._items = {}
         size = self._hex_size
         w = np.sqrt(3) * size
         h = 2 * size
@@ -154,20 +191,16 @@ class GUI:
             for x in range(grid_size):
                 pos_x = w/2 + (y*w/2) + x*w + w/2  # Centered in canvas
                 pos_y = h/2 + (h*3/4)*y + h/2      # Centered in canvas
-                
-                player = self._grid.get_hex([x, y])
-                if player == 1:
-                    color = self._p1_color
-                    outline = self._p1_dark
-                elif player == 2:
-                    color = self._p2_color
-                    outline = self._p2_dark
-                else:
-                    color = '#ECF0F1'  # Empty cell
-                    outline = '#BDC3C7'
-                
+                color, outline = self._colors(self._grid.get_hex([x, y]))
                 # Draw with shadow effect for a 3D look
-                self._draw_hex([pos_x, pos_y], color, outline, size)
+                self._items[(x, y)] = self._draw_hex([pos_x, pos_y], color, outline, size)
+
+    def _recolor(self, coordinate, player):
+        shadow, cell = self._items[(coordinate[0], coordinate[1])]
+        color, outline = self._colors(player)
+        darker_color = self._darken_color(color, 0.8)
+        self._grid_canvas.itemconfig(shadow, fill=darker_color, outline=darker_color)
+        self._grid_canvas.itemconfig(cell, fill=color, outline=outline)
 
     def _draw_border_areas(self, size, w, h, grid_size):
         # Calculate offsets based on the main grid positioning
@@ -199,26 +232,21 @@ class GUI:
             self._draw_hex([pos_x, pos_y], self._p2_dark, self._p2_dark, size)
 
     def _draw_hex(self, coordinates, color, outline, size):
-        points = []
-        for i in range(6):
-            angle_deg = 60 * i - 30
-            angle_rad = np.pi / 180 * angle_deg
-            points.append(coordinates[0] + size * np.cos(angle_rad))
-            points.append(coordinates[1] + size * np.sin(angle_rad))
+        """Create a hexagon and its shadow; returns their canvas item ids"""
+        corners = self._corners if size == self._hex_size else self._corners * (size / self._hex_size)
+        points = (corners + coordinates).ravel().tolist()
         
         # Draw with slight 3D effect
         # First draw a darker shadow slightly offset
-        shadow_points = []
         shadow_offset = 2
-        for i in range(0, len(points), 2):
-            shadow_points.append(points[i])
-            shadow_points.append(points[i+1] + shadow_offset)
+        shadow_points = (corners + [coordinates[0], coordinates[1] + shadow_offset]).ravel().tolist()
         
         darker_color = self._darken_color(color, 0.8)
-        self._grid_canvas.create_polygon(shadow_points, fill=darker_color, outline=darker_color)
+        shadow = self._grid_canvas.create_polygon(shadow_points, fill=darker_color, outline=darker_color)
         
         # Then draw the main hexagon
-        self._grid_canvas.create_polygon(points, fill=color, outline=outline, width=1)
+        cell = self._grid_canvas.create_polygon(points, fill=color, outline=outline, width=1)
+        return shadow, cell
 
     def _darken_color(self, hex_color, factor=0.7):
         """Darken a hex color by the given factor"""
@@ -250,7 +278,10 @@ class GUI:
         self._start_button.config(text="Game Over")
 
     def start(self):
+        if self.launch or self._controller._winner != 0:
+            return
         self.launch = True
+        self._screen.after(self.move_delay, self._next_move)
         self._start_button.config(text="Game in Progress")
         self._status_label.config(text="Game started")
         self._winner_label.config(text="")  # Clear any previous winner message
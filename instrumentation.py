@@ -0,0 +1,105 @@
+import cProfile
+import json
+import os
+import resource
+import time
+import tracemalloc
+
+
+def current_rss_kb():
+    """Resident set size of this process right now, or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class MoveTracer:
+    """Controller hook that writes one JSON line per move of a game.
+
+    Each move records wall and CPU seconds spent in step(), the time the
+    Controller spent on bookkeeping afterwards (updating its grid, the
+    opponent and the win check), the player's search_stats (nodes, TT hits,
+    depth), the process's RSS right after step() and its peak RSS so far
+    (which never goes down, so it only shows when memory first grew). With
+    track_memory the peak Python allocation during step() is measured
+    through tracemalloc too, which slows the agents down noticeably.
+    profile_move (1-based) runs that one step() under cProfile and dumps
+    the stats to profile_path, also when the step ends in a forfeit.
+
+    The Controller only calls the tracer when one is given, so games played
+    without one pay for a single None check per move.
+    """
+
+    def __init__(self, path, track_memory=False, profile_move=None, profile_path=None):
+        self.path = path
+        self.track_memory = track_memory
+        self.profile_move = profile_move
+        self.profile_path = profile_path or f"{path}.move{profile_move}.prof"
+        self._file = None
+        self._record = None
+        self._profiler = None
+
+    def start_game(self, size, player1, player2, time_limit):
+        self._file = open(self.path, "w")
+        self._write({"event": "start", "size": size, "players": [player1.name, player2.name],
+                     "time_limit": time_limit})
+        if self.track_memory:
+            tracemalloc.start()
+
+    def start_move(self, number, player):
+        self._record = {"event": "move", "move": number, "player": player}
+        if self.track_memory:
+            tracemalloc.reset_peak()
+        if number == self.profile_move:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def end_step(self, agent, coordinates):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self._stop_profiler()
+        record = self._record
+        record.update(coordinate=list(coordinates), wall_s=wall, cpu_s=cpu,
+                      stats=getattr(agent, "search_stats", {}),
+                      rss_kb=current_rss_kb(),
+                      process_peak_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        if self.track_memory:
+            record["peak_alloc_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        self._bookkeeping = time.perf_counter()
+
+    def end_move(self, time_left, winner):
+        record = self._record
+        record.update(bookkeeping_s=time.perf_counter() - self._bookkeeping, time_left=time_left)
+        self._write(record)
+        if winner:
+            self._end_game(winner, 0)
+
+    def lost_on_time(self, player):
+        self._write(self._record)
+        self._end_game(3 - player, player)
+
+    def forfeit(self, player, reason):
+        self._stop_profiler()
+        self._record["forfeit"] = reason
+        self._write(self._record)
+        self._end_game(3 - player, player if reason == "time" else 0)
+
+    def _stop_profiler(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+
+    def _end_game(self, winner, lost_on_time):
+        self._write({"event": "end", "winner": winner, "lost_on_time": lost_on_time,
+                     "moves": self._record["move"]})
+        if self.track_memory:
+            tracemalloc.stop()
+        self._file.close()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
@@ -1,10 +1,18 @@
 import argparse
+import multiprocessing
+import os
 import random
 import time
+import numpy as np
 from agent1 import CustomPlayer
 from agent2 import MinimaxPlayer
+from agent3 import MCTSPlayer
 from controller import Controller
 from gui import GUI
+from instrumentation import MoveTracer
+import records
+import sandbox
+from store import PositionStore, path_for
 
 def str2bool(v):
     if isinstance(v, bool):
@@ -16,30 +24,82 @@ def str2bool(v):
     else:
         raise argparse.ArgumentTypeError('Boolean value expected.')
 
-def run_single_game(size, player1_type, player2_type):
-    player_classes = {"Agent": CustomPlayer, "minimax": MinimaxPlayer}
-    player1 = player_classes[player1_type](size, 1, 2)
-    player2 = player_classes[player2_type](size, 2, 1)
+def attach_stores(directory, size, players):
+    """Give every (player type, player) with a transposition table its persistent store in directory"""
+    for number, (player_type, player) in enumerate(players, 1):
+        if getattr(player, "tt", None) is not None:
+            player.store = PositionStore(path_for(directory, player_type, size, number), size)
+
+def run_single_game(size, player1_type, player2_type, seed=None, time_limit=90.0, tracer=None, positions=None,
+                    opening=0, hosted=None):
+    """Play one game to the end; opening random moves (drawn from seed) are played for both sides first.
+
+    With hosted = (move deadline, RSS limit in bytes), each player runs in
+    its own process, kept warm across the games of this process, and is
+    forfeited when it breaks either limit (see sandbox.AgentHost).
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed % 2**32)
+    if hosted is not None:
+        player1, player2 = (sandbox.host(player_type, number, *hosted).player(size, number, positions, tracer is not None)
+                            for number, player_type in ((1, player1_type), (2, player2_type)))
+    else:
+        player_classes = {"Agent": CustomPlayer, "minimax": MinimaxPlayer, "mcts": MCTSPlayer}
+        player1 = player_classes[player1_type](size, 1, 2)
+        player2 = player_classes[player2_type](size, 2, 1)
+        if positions is not None:
+            attach_stores(positions, size, [(player1_type, player1), (player2_type, player2)])
     
-    controller = Controller(size, player1, player2)
+    controller = Controller(size, player1, player2, time_limit=time_limit, tracer=tracer)
+    if opening:
+        cells = [[x, y] for x in range(size) for y in range(size)]
+        random.Random(seed).shuffle(cells)
+        for move in cells[:opening]:
+            if controller._winner == 0:
+                controller.play_forced(move)
     
     while controller._winner == 0:
         controller.update()
     
-    return {
+    result = {
         "winner": controller._winner,
         "winner_name": player1.name if controller._winner == 1 else player2.name,
         "player1_type": player1_type,
-        "player2_type": player2_type
+        "player2_type": player2_type,
+        "lost_on_time": controller._lost_on_time,
+        "forfeit": controller._forfeit,
+        "moves": controller._history
     }
+    if hosted is not None:
+        # Per player: (moves, seconds from request to reply, seconds inside step())
+        result["latency"] = [(player.moves, player.latency, player.step_time) for player in (player1, player2)]
+    return result
 
-def run_evaluation(num_games=25, size=5):
+def _play_evaluation_game(job):
+    """Worker entry point: play one evaluation game from its (index, size, seed, time_limit, trace, positions,
+    hosted) job"""
+    index, size, seed, time_limit, trace, positions, hosted = job
+    # The seat assignment depends only on the game's seed, so serial and
+    # parallel runs with the same base seed play the very same games.
+    player1_type, player2_type = ("Agent", "minimax") if random.Random(seed).random() < 0.5 else ("minimax", "Agent")
+    tracer = None
+    if trace is not None:
+        trace_dir, profile_move, track_memory = trace
+        tracer = MoveTracer(os.path.join(trace_dir, f"game_{index}.jsonl"), track_memory=track_memory,
+                            profile_move=profile_move)
+    result = run_single_game(size, player1_type, player2_type, seed=seed, time_limit=time_limit,
+                             tracer=tracer, positions=positions, hosted=hosted)
+    result["game"] = index
+    return result
+
+def run_evaluation(num_games=25, size=5, workers=1, seed=0, time_limit=90.0, trace=None, record=None,
+                   positions=None, hosted=None):
     print(f"\n{'=' * 60}")
-    print(f"EVALUATION MODE: Running {num_games} games with board size {size}")
+    print(f"EVALUATION MODE: Running {num_games} games with board size {size} on {workers} worker(s)")
     print(f"{'=' * 60}\n")
     
     results = []
-    player_types = ["Agent", "minimax"]
     stats = {
         "Agent_wins": 0,
         "minimax_wins": 0,
@@ -51,33 +111,58 @@ def run_evaluation(num_games=25, size=5):
     }
     
     start_time = time.time()
+    if positions is not None:
+        # Create the store files up front so that workers only ever open them
+        os.makedirs(positions, exist_ok=True)
+        for player_type in ("Agent", "minimax"):
+            for number in (1, 2):
+                PositionStore(path_for(positions, player_type, size, number), size)
+    jobs = [(i, size, seed + i, time_limit, trace, positions, hosted) for i in range(num_games)]
     
-    for i in range(num_games):
-        # Randomly assign player types to positions
-        random.shuffle(player_types)
-        player1_type, player2_type = player_types
-        
-        print(f"Game {i+1}/{num_games}: Player 1 = {player1_type.capitalize()}, Player 2 = {player2_type.capitalize()}")
-        
-        result = run_single_game(size, player1_type, player2_type)
-        results.append(result)
-        
-        # Update statistics
-        winner_type = result["player1_type"] if result["winner"] == 1 else result["player2_type"]
-        if winner_type == "Agent":
-            stats["Agent_wins"] += 1
-            if result["winner"] == 1:
-                stats["Agent_as_p1_wins"] += 1
-            else:
-                stats["Agent_as_p2_wins"] += 1
-        else:  # minimax
-            stats["minimax_wins"] += 1
-            if result["winner"] == 1:
-                stats["minimax_as_p1_wins"] += 1
-            else:
-                stats["minimax_as_p2_wins"] += 1
-                
-        print(f"  → Winner: Player {result['winner']} ({result['winner_name']})\n")
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    games = pool.imap(_play_evaluation_game, jobs) if pool else map(_play_evaluation_game, jobs)
+    try:
+        # imap yields in submission order, so the report reads the same
+        # whichever worker finished first.
+        for result in games:
+            results.append(result)
+            if record:
+                records.append(record, records.from_coordinates(
+                    size, (result["player1_type"], result["player2_type"]), result["winner"],
+                    result["lost_on_time"], result["moves"], result["forfeit"]))
+            i = result["game"]
+            print(f"Game {i+1}/{num_games}: Player 1 = {result['player1_type'].capitalize()}, Player 2 = {result['player2_type'].capitalize()}")
+            
+            # Update statistics
+            winner_type = result["player1_type"] if result["winner"] == 1 else result["player2_type"]
+            if winner_type == "Agent":
+                stats["Agent_wins"] += 1
+                if result["winner"] == 1:
+                    stats["Agent_as_p1_wins"] += 1
+                else:
+                    stats["Agent_as_p2_wins"] += 1
+            else:  # minimax
+                stats["minimax_wins"] += 1
+                if result["winner"] == 1:
+                    stats["minimax_as_p1_wins"] += 1
+                else:
+                    stats["minimax_as_p2_wins"] += 1
+                    
+            on_time = " on time" if result["lost_on_time"] else ""
+            if result["forfeit"] not in (None, "time"):
+                on_time = f" by forfeit ({result['forfeit']})"
+            print(f"  → Winner: Player {result['winner']} ({result['winner_name']}){on_time}\n")
+    except BaseException:
+        if pool:
+            pool.terminate()  # on an error or Ctrl-C, queued games are not waited for
+        raise
+    else:
+        if pool:
+            pool.close()
+    finally:
+        if pool:
+            pool.join()
+        sandbox.close_hosts()
     
     elapsed_time = time.time() - start_time
     
@@ -113,6 +198,14 @@ def run_evaluation(num_games=25, size=5):
     print(f"  Agent as Player 2 (left-right): {stats['Agent_as_p2_wins']}/{Agent_games_as_p2} wins ({Agent_p2_win_pct:.1f}%)")
     print(f"  Minimax as Player 1 (top-bottom): {stats['minimax_as_p1_wins']}/{minimax_games_as_p1} wins ({minimax_p1_win_pct:.1f}%)")
     print(f"  Minimax as Player 2 (left-right): {stats['minimax_as_p2_wins']}/{minimax_games_as_p2} wins ({minimax_p2_win_pct:.1f}%)")
+    forfeits = [r["forfeit"] for r in results if r["forfeit"]]
+    if forfeits:
+        print("\nForfeits: " + ", ".join(f"{reason} {forfeits.count(reason)}" for reason in sorted(set(forfeits))))
+    if hosted is not None and results:
+        moves, latency, step_time = (sum(t) for t in zip(*(player for r in results for player in r["latency"])))
+        if moves:
+            print(f"\nMove latency: {latency / moves * 1e3:.2f} ms per move, "
+                  f"of which IPC {(latency - step_time) / moves * 1e3:.3f} ms")
     print(f"{'=' * 60}\n")
     
     return stats
@@ -120,25 +213,60 @@ def run_evaluation(num_games=25, size=5):
 def main():
     parser = argparse.ArgumentParser(description="AI-Rena Game")
     parser.add_argument("--gui", type=str2bool, default=True, help="Enable GUI (true/false)")
-    parser.add_argument("--players", nargs=2, choices=["Agent", "minimax"], required=False, help="Player types")
-    parser.add_argument("--size", type=int, default=9, help="Grid size")
+    parser.add_argument("--players", nargs=2, choices=["Agent", "minimax", "mcts"], required=False, help="Player types")
+    parser.add_argument("--size", type=int, default=None, help="Grid size (default: 9, or 5 with --eval)")
     parser.add_argument("--eval", action="store_true", help="Run evaluation mode")
+    parser.add_argument("--games", type=int, default=25, help="Number of evaluation games")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to spread evaluation games over")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed for evaluation games")
+    parser.add_argument("--time-limit", type=float, default=90.0, help="Seconds on each player's clock (0 for untimed)")
+    parser.add_argument("--trace", help="Write a JSONL move trace to this file (a directory with --eval)")
+    parser.add_argument("--trace-memory", action="store_true", help="Trace peak allocations per move (slow)")
+    parser.add_argument("--record", help="Append the game record(s) to this file")
+    parser.add_argument("--profile-move", type=int, help="Run this move (1-based) under cProfile when tracing")
+    parser.add_argument("--positions", help="Directory of persistent position stores the search agents share across games")
+    parser.add_argument("--sandbox", action="store_true", help="Run each player in its own process")
+    parser.add_argument("--move-deadline", type=float, default=0,
+                        help="Seconds a sandboxed player may spend on one move (0 for only its clock)")
+    parser.add_argument("--rss-limit", type=float, default=0, help="Megabytes a sandboxed player may use (0 for no limit)")
     args = parser.parse_args()
+    time_limit = args.time_limit if args.time_limit > 0 else None
+    hosted = None
+    if args.sandbox:
+        hosted = (args.move_deadline or None, int(args.rss_limit * 2**20) or None)
     
     # If eval mode is enabled, run the evaluation and exit
     if args.eval:
-        run_evaluation(num_games=25, size=5)
+        trace = None
+        if args.trace:
+            os.makedirs(args.trace, exist_ok=True)
+            trace = (args.trace, args.profile_move, args.trace_memory)
+        run_evaluation(num_games=args.games, size=args.size or 5, workers=args.workers, seed=args.seed,
+                       time_limit=time_limit, trace=trace, record=args.record, positions=args.positions,
+                       hosted=hosted)
         return
+    args.size = args.size or 9
     
     # Regular game mode
     if not args.players:
         parser.error("the --players argument is required for regular game mode")
     
-    player_classes = {"Agent": CustomPlayer, "minimax": MinimaxPlayer}
-    player1 = player_classes[args.players[0]](args.size, 1, 2)
-    player2 = player_classes[args.players[1]](args.size, 2, 1)
+    if args.positions:
+        os.makedirs(args.positions, exist_ok=True)
+    tracer = None
+    if args.trace:
+        tracer = MoveTracer(args.trace, track_memory=args.trace_memory, profile_move=args.profile_move)
+    if hosted is not None:
+        player1 = sandbox.host(args.players[0], 1, *hosted).player(args.size, 1, args.positions, tracer is not None)
+        player2 = sandbox.host(args.players[1], 2, *hosted).player(args.size, 2, args.positions, tracer is not None)
+    else:
+        player_classes = {"Agent": CustomPlayer, "minimax": MinimaxPlayer, "mcts": MCTSPlayer}
+        player1 = player_classes[args.players[0]](args.size, 1, 2)
+        player2 = player_classes[args.players[1]](args.size, 2, 1)
+        if args.positions:
+            attach_stores(args.positions, args.size, [(args.players[0], player1), (args.players[1], player2)])
 
-    controller = Controller(args.size, player1, player2)
+    controller = Controller(args.size, player1, player2, time_limit=time_limit, tracer=tracer)
     if args.gui:
         gui = GUI(controller)
         gui.start()
@@ -146,7 +274,15 @@ def main():
     else:
         while controller._winner == 0:
             controller.update()
-        print(f"Player {controller._winner} wins!")
+        on_time = " on time" if controller._lost_on_time else ""
+        if controller._forfeit not in (None, "time"):
+            on_time = f" by forfeit ({controller._forfeit})"
+        print(f"Player {controller._winner} wins{on_time}!")
+    sandbox.close_hosts()
+    if args.record and controller._winner:
+        records.append(args.record, records.from_coordinates(
+            args.size, args.players, controller._winner, controller._lost_on_time, controller._history,
+            controller._forfeit))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,153 @@
+import argparse
+import math
+import multiprocessing
+import time
+import sandbox
+from main import run_single_game
+
+PLAYER_TYPES = ["Agent", "minimax", "mcts"]
+
+
+def elo_to_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+class SPRT:
+    """Sequential probability ratio test on game pairs.
+
+    Each pair is the same seed played once with each colour, scored 0, 0.5
+    or 1 for the first player, which cancels the first-move advantage. The
+    log-likelihood ratio of H1 (elo = elo1) against H0 (elo = elo0) uses the
+    normal approximation of the pair scores, as chess engine testers do:
+    LLR = n (s1 - s0) (2 mean - s0 - s1) / (2 var). The test stops when it
+    leaves (log(beta / (1 - alpha)), log((1 - beta) / alpha)).
+    """
+
+    def __init__(self, elo0=0.0, elo1=50.0, alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.counts = [0, 0, 0]  # pairs scored 0, 0.5 and 1
+
+    def add(self, wins):
+        """Record a pair in which the first player won 0, 1 or 2 games"""
+        self.counts[wins] += 1
+
+    def pairs(self):
+        return sum(self.counts)
+
+    def mean(self):
+        return (0.5 * self.counts[1] + self.counts[2]) / self.pairs()
+
+    def variance(self):
+        # Half a pseudo-pair per outcome keeps the variance away from zero
+        # when every pair so far ended the same way.
+        counts = [c + 0.5 for c in self.counts]
+        total = sum(counts)
+        mean = (0.5 * counts[1] + counts[2]) / total
+        return sum(c * (score - mean) ** 2 for c, score in zip(counts, (0.0, 0.5, 1.0))) / total
+
+    def llr(self):
+        if not self.pairs():
+            return 0.0
+        s0, s1 = elo_to_score(self.elo0), elo_to_score(self.elo1)
+        return self.pairs() * (s1 - s0) * (2 * self.mean() - s0 - s1) / (2 * self.variance())
+
+    def status(self):
+        """'H1' (elo1 accepted), 'H0' (elo0 accepted) or None while undecided"""
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def elo(self, z=1.96):
+        """Elo estimate and its confidence interval at z standard errors"""
+        mean = self.mean()
+        margin = z * math.sqrt(self.variance() / self.pairs())
+        return score_to_elo(mean), score_to_elo(mean - margin), score_to_elo(mean + margin)
+
+
+def _play_pair(job):
+    """Worker entry point: the same seeded opening with each player taking the first move once.
+
+    The search agents are deterministic, so without random opening moves
+    every pair would replay the very same two games.
+    """
+    index, size, first, second, seed, time_limit, hosted, opening = job
+    a = run_single_game(size, first, second, seed=seed, time_limit=time_limit, hosted=hosted, opening=opening)
+    b = run_single_game(size, second, first, seed=seed, time_limit=time_limit, hosted=hosted, opening=opening)
+    return index, (a["winner"] == 1) + (b["winner"] == 2)
+
+
+def run_match(first, second, size=7, sprt=None, max_games=1000, workers=1, seed=0, time_limit=90.0, hosted=None,
+              opening=2):
+    sprt = sprt or SPRT()
+    print(f"SPRT {first} vs {second} on {size}x{size}: H0 elo={sprt.elo0:g}, H1 elo={sprt.elo1:g}, "
+          f"LLR bounds [{sprt.lower:.2f}, {sprt.upper:.2f}]")
+    jobs = [(i, size, first, second, seed + i, time_limit, hosted, opening) for i in range(max_games // 2)]
+    start = time.time()
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    pairs = pool.imap(_play_pair, jobs) if pool else map(_play_pair, jobs)
+    status = None
+    try:
+        for index, wins in pairs:
+            sprt.add(wins)
+            elo, low, high = sprt.elo()
+            print(f"Pair {index + 1}: {first} won {wins}/2 | games {2 * sprt.pairs()} "
+                  f"| elo {elo:+.0f} [{low:+.0f}, {high:+.0f}] | LLR {sprt.llr():+.2f}")
+            status = sprt.status()
+            if status:
+                break
+    finally:
+        if pool:
+            pool.terminate()  # pairs still running are no longer needed
+            pool.join()
+        sandbox.close_hosts()
+
+    elo, low, high = sprt.elo()
+    verdict = {"H1": f"H1 accepted: {first} is at least {sprt.elo1:g} Elo stronger",
+               "H0": f"H0 accepted: {first} is not {sprt.elo1:g} Elo stronger",
+               None: "undecided: game limit reached"}[status]
+    print(f"\n{verdict}")
+    print(f"{2 * sprt.pairs()} games in {time.time() - start:.1f}s, "
+          f"elo {elo:+.1f} (95% CI {low:+.1f} to {high:+.1f})")
+    return status, sprt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SPRT match between two player types")
+    parser.add_argument("players", nargs=2, choices=PLAYER_TYPES, help="Player under test, then the baseline")
+    parser.add_argument("--size", type=int, default=7, help="Grid size")
+    parser.add_argument("--elo0", type=float, default=0.0, help="Elo difference under H0")
+    parser.add_argument("--elo1", type=float, default=50.0, help="Elo difference under H1")
+    parser.add_argument("--alpha", type=float, default=0.05, help="False positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="False negative rate")
+    parser.add_argument("--max-games", type=int, default=1000, help="Stop undecided after this many games")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to spread game pairs over")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed; pair i uses seed + i")
+    parser.add_argument("--opening", type=int, default=2,
+                        help="Random moves, drawn from the pair's seed, played before the players take over")
+    parser.add_argument("--time-limit", type=float, default=90.0, help="Seconds on each player's clock (0 for untimed)")
+    parser.add_argument("--sandbox", action="store_true", help="Run each player in its own process")
+    parser.add_argument("--move-deadline", type=float, default=0,
+                        help="Seconds a sandboxed player may spend on one move (0 for only its clock)")
+    parser.add_argument("--rss-limit", type=float, default=0, help="Megabytes a sandboxed player may use (0 for no limit)")
+    args = parser.parse_args()
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+    hosted = (args.move_deadline or None, int(args.rss_limit * 2**20) or None) if args.sandbox else None
+    run_match(args.players[0], args.players[1], args.size, sprt, args.max_games, args.workers, args.seed,
+              args.time_limit if args.time_limit > 0 else None, hosted, args.opening)
+
+if __name__ == "__main__":
+    main()
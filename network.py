@@ -0,0 +1,142 @@
+import argparse
+import numpy as np
+from evaluation import Evaluator
+
+# A cell and its six neighbours as (dx, dy): the taps of a hex convolution
+TAPS = [(0, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0)]
+PLANES = 4
+
+
+class NetworkEvaluator(Evaluator):
+    """A small convolutional value/policy network run with NumPy.
+
+    Every position is seen from the side of the player being scored. For
+    player 2 the board is transposed and the colours swapped, so the
+    player always joins x=0 to x=size-1. The input planes are the
+    player's stones, the opponent's, the empty cells and whether the
+    player is to move. They are padded by one ring in which the x edges
+    count as the player's stones and the y edges as the opponent's. Each
+    layer is a hex convolution over a cell and its six neighbours followed
+    by ReLU. The value head averages the last layer over the board and
+    squashes a linear read-out through tanh, scaled by scale. The policy
+    head is a per-cell linear read-out, softmaxed over the empty cells.
+
+    The weights work on any board size. Each layer is one matrix product
+    over a whole chunk of positions, so per-call overhead is paid once per
+    chunk rather than once per position.
+    """
+
+    def __init__(self, weights, scale=100.0, chunk=32):
+        self.scale = scale
+        self.chunk = chunk
+        self.layers = []
+        while f"conv{len(self.layers)}_w" in weights:
+            i = len(self.layers)
+            self.layers.append((np.asarray(weights[f"conv{i}_w"], dtype=np.float32),
+                                np.asarray(weights[f"conv{i}_b"], dtype=np.float32)))
+        self.value_w = np.asarray(weights["value_w"], dtype=np.float32)
+        self.value_b = float(weights["value_b"])
+        self.policy_w = np.asarray(weights["policy_w"], dtype=np.float32)
+        self.policy_b = float(weights["policy_b"])
+        self._taps = {}
+
+    @classmethod
+    def load(cls, path, scale=100.0):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files}, scale)
+
+    def _tap_table(self, size):
+        """Per board cell, the padded-grid index of each of its TAPS"""
+        if size not in self._taps:
+            grid = np.arange((size + 2) ** 2).reshape(size + 2, size + 2)
+            self._taps[size] = np.stack([grid[1 + dx:1 + dx + size, 1 + dy:1 + dy + size].ravel()
+                                         for dx, dy in TAPS], axis=1)
+        return self._taps[size]
+
+    def forward(self, cells, player, to_move):
+        """(values in [-1, 1], policy logits per flat cell) for a batch of flat boards.
+
+        The batch is run chunk positions at a time: one large product per
+        layer falls out of cache and runs at half the speed.
+        """
+        values, logits = zip(*(self._forward(cells[i:i + self.chunk], player, to_move)
+                               for i in range(0, len(cells), self.chunk)))
+        return np.concatenate(values), np.concatenate(logits)
+
+    def _forward(self, cells, player, to_move):
+        count, cells_per_board = cells.shape
+        size = int(round(cells_per_board ** 0.5))
+        boards = cells.reshape(count, size, size)
+        if player == 2:
+            boards = boards.transpose(0, 2, 1)
+        h = np.zeros((count, size + 2, size + 2, PLANES), dtype=np.float32)
+        inner = h[:, 1:-1, 1:-1]
+        inner[..., 0] = boards == player
+        inner[..., 1] = boards == 3 - player
+        inner[..., 2] = boards == 0
+        inner[..., 3] = to_move == player
+        h[:, [0, -1], 1:-1, 0] = 1.0  # the x edges are the player's
+        h[:, 1:-1, [0, -1], 1] = 1.0  # the y edges the opponent's
+
+        # Activations are kept channels last on the padded grid, flattened,
+        # so gathering the taps builds each layer's (cells, taps*channels)
+        # input in one call
+        taps = self._tap_table(size)
+        centre = taps[:, 0]
+        h = h.reshape(count, -1, PLANES)
+        for weight, bias in self.layers:
+            out = np.take(h, taps, axis=1).reshape(count * cells_per_board, -1) @ weight
+            out += bias
+            np.maximum(out, 0.0, out=out)
+            h = np.zeros((count, h.shape[1], weight.shape[1]), dtype=np.float32)
+            h[:, centre] = out.reshape(count, cells_per_board, -1)
+
+        features = h[:, centre]
+        values = np.tanh(features.mean(axis=1) @ self.value_w + self.value_b)
+        logits = features @ self.policy_w + self.policy_b
+        if player == 2:
+            logits = logits.reshape(count, size, size).transpose(0, 2, 1).reshape(count, -1)
+        return values, logits
+
+    def evaluate_batch(self, cells, player, to_move):
+        return self.scale * self.forward(cells, player, to_move)[0].astype(float)
+
+    def evaluate_cells(self, cells, player, to_move):
+        return float(self.evaluate_batch(cells[None], player, to_move)[0])
+
+    def priors(self, board, player):
+        cells = np.array(board._cells, dtype=np.int8)
+        logits = self.forward(cells[None], player, board.to_move())[1][0]
+        logits[cells != 0] = -np.inf
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+
+def init_weights(channels=32, layers=4, seed=0):
+    """He-initialised weights in the layout NetworkEvaluator loads"""
+    rng = np.random.default_rng(seed)
+    weights = {}
+    inputs = PLANES
+    for i in range(layers):
+        fan_in = len(TAPS) * inputs
+        weights[f"conv{i}_w"] = rng.normal(0, np.sqrt(2 / fan_in), (fan_in, channels)).astype(np.float32)
+        weights[f"conv{i}_b"] = np.zeros(channels, dtype=np.float32)
+        inputs = channels
+    weights["value_w"] = rng.normal(0, np.sqrt(1 / inputs), inputs).astype(np.float32)
+    weights["value_b"] = np.float32(0)
+    weights["policy_w"] = rng.normal(0, np.sqrt(1 / inputs), inputs).astype(np.float32)
+    weights["policy_b"] = np.float32(0)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write freshly initialised network weights")
+    parser.add_argument("output", help="Weights file (.npz)")
+    parser.add_argument("--channels", type=int, default=32, help="Channels per convolution")
+    parser.add_argument("--layers", type=int, default=4, help="Number of convolutions")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the initial weights")
+    args = parser.parse_args()
+    np.savez(args.output, **init_weights(args.channels, args.layers, args.seed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import sys
+import time
+from collections import Counter, namedtuple
+from grid import Grid
+
+# Every record starts with this byte so that a truncated or foreign file is
+# noticed instead of being decoded as garbage.
+MAGIC = 0xA5
+
+# Why the loser forfeited, as stored in the header; index 0 is a game played out
+FORFEITS = (None, "time", "memory", "crashed", "protocol")
+
+GameRecord = namedtuple("GameRecord", "size players winner lost_on_time moves forfeit", defaults=(None,))
+GameRecord.__doc__ = """One finished game; moves are flat cell indices x*size + y, player 1 first.
+
+lost_on_time is the player who ran out of time (0 if nobody did) and
+forfeit the reason the loser forfeited, one of FORFEITS.
+"""
+
+
+def _varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return out
+
+
+def encode(record):
+    """Serialise a GameRecord.
+
+    Layout: MAGIC, size, winner | lost_on_time << 2 | forfeit << 4 (the
+    reason's index in FORFEITS), the two player names as length-prefixed
+    ASCII, the move count and every move as varints. Cell indices below 128
+    (every board up to 11x11) take one byte each.
+    """
+    forfeit = FORFEITS.index(record.forfeit)
+    out = bytearray([MAGIC, record.size, record.winner | record.lost_on_time << 2 | forfeit << 4])
+    for name in record.players:
+        name = name.encode("ascii")
+        out.append(len(name))
+        out += name
+    out += _varint(len(record.moves))
+    for move in record.moves:
+        out += _varint(move)
+    return bytes(out)
+
+
+def decode_all(data):
+    """Yield every GameRecord in a bytes stream of concatenated records.
+
+    Raises ValueError for a foreign, corrupt or truncated stream, e.g. a
+    file still being written.
+    """
+    pos = 0
+    end = len(data)
+    while pos < end:
+        start = pos
+        if data[pos] != MAGIC:
+            raise ValueError(f"not a game record at byte {pos}")
+        if pos + 3 > end:
+            raise ValueError("truncated record")
+        size = data[pos + 1]
+        flags = data[pos + 2]
+        pos += 3
+        players = []
+        for _ in range(2):
+            if pos >= end or pos + 1 + data[pos] > end:
+                raise ValueError("truncated record")
+            length = data[pos]
+            players.append(data[pos + 1:pos + 1 + length].decode("ascii"))
+            pos += 1 + length
+        values = []
+        count = None
+        while count is None or len(values) < count:
+            value = 0
+            shift = 0
+            while True:
+                if pos >= end:
+                    raise ValueError("truncated record")
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            if count is None:
+                count = value
+            elif value >= size * size:
+                raise ValueError(f"move off the board in record at byte {start}")
+            else:
+                values.append(value)
+        if flags >> 4 >= len(FORFEITS):
+            raise ValueError(f"unknown forfeit reason in record at byte {start}")
+        lost_on_time = flags >> 2 & 3
+        # Records written before the reason was stored only flag time losses
+        forfeit = FORFEITS[flags >> 4] or ("time" if lost_on_time else None)
+        yield GameRecord(size, tuple(players), flags & 3, lost_on_time, values, forfeit)
+
+
+def append(path, record):
+    """Append one record to a stream file"""
+    with open(path, "ab") as f:
+        f.write(encode(record))
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return list(decode_all(f.read()))
+
+
+def load(path):
+    """read() for the command line: a damaged or half-written file ends the program with its error"""
+    try:
+        return read(path)
+    except ValueError as error:
+        sys.exit(f"{path}: {error}")
+
+
+def from_coordinates(size, players, winner, lost_on_time, moves, forfeit=None):
+    forfeit = forfeit or ("time" if lost_on_time else None)
+    return GameRecord(size, tuple(players), winner, lost_on_time, [x * size + y for x, y in moves], forfeit)
+
+
+def replay(record, ply=None):
+    """Grid holding the position after ply moves (the final one by default)"""
+    size = record.size
+    grid = Grid(size)
+    moves = record.moves if ply is None else record.moves[:ply]
+    for i, move in enumerate(moves):
+        grid.set_hex(1 + i % 2, (move // size, move % size))
+    return grid
+
+
+def decisive_positions(records):
+    """Yield (grid, move) for the position before each game's winning move.
+
+    Forfeited games are skipped, as their last move decided nothing.
+    """
+    for record in records:
+        if record.moves and not record.forfeit:
+            yield replay(record, len(record.moves) - 1), record.moves[-1]
+
+
+def summarize(records):
+    """Game length, per-colour and per-first-move win rates and winning cells.
+
+    Forfeited games count towards the lengths and colour wins only: a
+    forfeit says nothing about the first move or the last one.
+    """
+    lengths = [len(r.moves) for r in records]
+    first_moves = {}
+    winning_cells = Counter()
+    for r in records:
+        if r.moves and not r.forfeit:
+            played, won = first_moves.get(r.moves[0], (0, 0))
+            first_moves[r.moves[0]] = (played + 1, won + (r.winner == 1))
+            winning_cells[r.moves[-1]] += 1
+    return {
+        "games": len(records),
+        "mean_length": sum(lengths) / len(lengths) if lengths else 0.0,
+        "min_length": min(lengths, default=0),
+        "max_length": max(lengths, default=0),
+        "player1_wins": sum(1 for r in records if r.winner == 1),
+        "lost_on_time": sum(1 for r in records if r.lost_on_time),
+        "forfeits": Counter(r.forfeit for r in records if r.forfeit and not r.lost_on_time),
+        "first_moves": first_moves,
+        "winning_cells": winning_cells,
+    }
+
+
+def print_summary(summary, size):
+    games = summary["games"]
+    print(f"Games: {games}")
+    print(f"Length: mean {summary['mean_length']:.1f}, min {summary['min_length']}, max {summary['max_length']}")
+    if games:
+        print(f"Player 1 wins: {summary['player1_wins']} ({summary['player1_wins'] / games:.1%})")
+    print(f"Lost on time: {summary['lost_on_time']}")
+    if summary["forfeits"]:
+        print("Other forfeits: " + ", ".join(f"{reason} {count}" for reason, count in sorted(summary["forfeits"].items())))
+    print("First move        games  p1 win rate")
+    for move, (played, won) in sorted(summary["first_moves"].items(), key=lambda item: -item[1][0]):
+        print(f"  {str([move // size, move % size]):<15} {played:>5}  {won / played:>10.1%}")
+    print("Most common winning moves:")
+    for move, count in summary["winning_cells"].most_common(5):
+        print(f"  {str([move // size, move % size]):<15} {count:>5}")
+
+
+def print_position(grid):
+    size = grid.get_size()
+    symbols = ".XO"
+    for y in range(size):
+        print(" " * y + " ".join(symbols[grid.get_hex((x, y))] for x in range(size)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded games")
+    commands = parser.add_subparsers(dest="command")
+    stats = commands.add_parser("stats", help="Summary statistics of a record file")
+    stats.add_argument("path", help="Record file written with main.py --record")
+    show = commands.add_parser("show", help="Print the position of one game")
+    show.add_argument("path", help="Record file written with main.py --record")
+    show.add_argument("--game", type=int, default=0, help="Game number in the file (0-based)")
+    show.add_argument("--ply", type=int, help="Number of moves to replay (default: all)")
+    decisive = commands.add_parser("decisive", help="Print the position before each game's winning move")
+    decisive.add_argument("path", help="Record file written with main.py --record")
+    decisive.add_argument("--limit", type=int, default=10, help="Number of positions to print")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        start = time.perf_counter()
+        records = load(args.path)
+        for record in records:
+            replay(record)
+        elapsed = time.perf_counter() - start
+        sizes = {r.size for r in records}
+        for size in sorted(sizes):
+            print(f"Board size {size}")
+            print_summary(summarize([r for r in records if r.size == size]), size)
+        rate = len(records) / elapsed if elapsed > 0 else 0.0
+        print(f"Replayed {len(records)} games in {elapsed:.3f}s ({rate:,.0f} games/sec)")
+    elif args.command == "show":
+        record = load(args.path)[args.game]
+        print(f"{record.players[0]} vs {record.players[1]}, {len(record.moves)} moves, "
+              f"winner: player {record.winner}")
+        print_position(replay(record, args.ply))
+    elif args.command == "decisive":
+        for i, (grid, move) in enumerate(decisive_positions(load(args.path))):
+            if i == args.limit:
+                break
+            size = grid.get_size()
+            print(f"Position {i}: winning move {[move // size, move % size]}")
+            print_position(grid)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import json
+import math
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from agent import Agent
+from controller import Forfeit
+
+# Every message is a one-byte opcode and a payload length, then the payload
+HEADER = struct.Struct("<cH")
+MOVE_REPLY = struct.Struct("<BBd")
+NEW_GAME = b"N"   # size, seat, store directory (utf-8, may be empty)  -> READY
+READY = b"R"      # agent name (utf-8)
+STEP = b"S"       # seconds left (NaN when untimed), whether to send stats  -> MOVE
+MOVE = b"M"       # x, y, seconds spent in step(), search_stats as JSON when asked for
+UPDATE = b"U"     # x, y of the opponent's move
+STONE = b"F"      # player, x, y of a move played for both sides
+END_GAME = b"E"   # winner
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes(pid):
+    """Resident set size of process pid, or None where /proc is not available"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class AgentHost:
+    """One agent running in its own process for a whole match.
+
+    The process is started once and imports the agent modules, the opening
+    book and the board tables a single time; every game then only builds a
+    fresh agent in it. Moves go over the process's stdin and stdout as
+    HEADER-framed messages of a few bytes each; whatever the agent prints
+    goes to stderr.
+
+    While a move is searched, the host waits on the pipe in slices of
+    poll_interval and checks the process's RSS between them. If the agent
+    runs past its deadline (the seconds left on its clock, capped at
+    move_deadline), exceeds rss_limit bytes or dies, the process is killed
+    and step() raises Forfeit. A killed agent is started again, cold, at
+    the next game.
+    """
+
+    def __init__(self, player_type, move_deadline=None, rss_limit=None, poll_interval=0.02,
+                 start_timeout=60.0):
+        self.player_type = player_type
+        self.move_deadline = move_deadline
+        self.rss_limit = rss_limit
+        self.poll_interval = poll_interval
+        self.start_timeout = start_timeout
+        self.peak_rss = 0
+        self._process = None
+        self._buffer = b""
+
+    def player(self, size, player_number, positions=None, stats=False):
+        """A fresh agent for one game, seated as player_number; returns its RemotePlayer"""
+        if self._process is None or self._process.poll() is not None:
+            self._start()
+        self._send(NEW_GAME, struct.pack("<BB", size, player_number) + (positions or "").encode())
+        payload = self._receive(READY, time.perf_counter() + self.start_timeout)
+        return RemotePlayer(self, size, player_number, payload.decode(), stats)
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+    def _start(self):
+        self._process = subprocess.Popen([sys.executable, os.path.abspath(__file__), self.player_type],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self._buffer = b""
+
+    def _kill(self):
+        self._process.kill()
+        self._process.wait()
+        self._process.stdin.close()
+        self._process.stdout.close()
+        self._process = None
+
+    def _send(self, opcode, payload=b""):
+        """Write a message; a dead process is noticed by the next _receive instead"""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.write(HEADER.pack(opcode, len(payload)) + payload)
+        except OSError:
+            pass
+
+    def _receive(self, opcode, deadline):
+        """Payload of the next message, which must be opcode; raises Forfeit on any violation"""
+        if self._process is None:
+            raise Forfeit("crashed")
+        fd = self._process.stdout.fileno()
+        while True:
+            if len(self._buffer) >= HEADER.size:
+                received, length = HEADER.unpack_from(self._buffer)
+                end = HEADER.size + length
+                if len(self._buffer) >= end:
+                    payload = self._buffer[HEADER.size:end]
+                    self._buffer = self._buffer[end:]
+                    if received != opcode:
+                        self._kill()
+                        raise Forfeit("protocol")
+                    return payload
+            now = time.perf_counter()
+            if now >= deadline:
+                self._kill()
+                raise Forfeit("time")
+            readable, _, _ = select.select([fd], [], [], min(self.poll_interval, deadline - now))
+            if readable:
+                data = os.read(fd, 65536)
+                if not data:
+                    self._kill()
+                    raise Forfeit("crashed")
+                self._buffer += data
+            rss = rss_bytes(self._process.pid)
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss, rss)
+                if self.rss_limit is not None and rss > self.rss_limit:
+                    self._kill()
+                    raise Forfeit("memory")
+
+
+class RemotePlayer(Agent):
+    """The Controller's side of an agent hosted by an AgentHost.
+
+    It keeps its own copy of the board, so tracers can read it like any
+    agent's. step() is timed from sending the request to decoding the
+    reply, so its latency includes the pipe and both ends' message
+    handling; search_stats reports that latency, the time the agent itself
+    spent in step() and the difference as ipc_s. The agent's own
+    search_stats are sent along only when stats is set.
+    """
+
+    def __init__(self, host, size, player_number, name, stats=False):
+        super().__init__(size, player_number, 3 - player_number)
+        self.host = host
+        self.name = name
+        self.stats = stats
+        self.search_stats = {}
+        self.moves = 0
+        self.latency = 0.0
+        self.step_time = 0.0
+
+    def step(self):
+        time_left = math.nan if self.time_left is None else self.time_left
+        deadline = math.inf if self.time_left is None else self.time_left
+        if self.host.move_deadline is not None:
+            deadline = min(deadline, self.host.move_deadline)
+        start = time.perf_counter()
+        self.host._send(STEP, struct.pack("<d?", time_left, self.stats))
+        payload = self.host._receive(MOVE, start + deadline)
+        latency = time.perf_counter() - start
+        x, y, step_time = MOVE_REPLY.unpack_from(payload)
+        self.search_stats = json.loads(payload[MOVE_REPLY.size:]) if self.stats else {}
+        self.search_stats.update(latency_s=latency, step_s=step_time, ipc_s=latency - step_time,
+                                 agent_peak_rss_kb=self.host.peak_rss // 1024)
+        self.moves += 1
+        self.latency += latency
+        self.step_time += step_time
+        move = [x, y]
+        Agent.set_hex(self, self.player_number, move)
+        return move
+
+    def update(self, move_other_player):
+        Agent.set_hex(self, self.adv_number, move_other_player)
+        self.host._send(UPDATE, struct.pack("<BB", *move_other_player))
+
+    def set_hex(self, player, coordinate):
+        # Only called from outside, for stones played without asking either agent
+        super().set_hex(player, coordinate)
+        self.host._send(STONE, struct.pack("<BBB", player, *coordinate))
+
+    def end_game(self, winner):
+        self.host._send(END_GAME, struct.pack("<B", winner))
+
+
+_hosts = {}
+
+
+def host(player_type, seat, move_deadline=None, rss_limit=None):
+    """The AgentHost of player_type in seat for this process, started on first use and kept for the match.
+
+    A process holds one agent at a time, so when both seats play the same
+    type each gets a host of its own.
+    """
+    key = (player_type, seat, move_deadline, rss_limit)
+    if key not in _hosts:
+        _hosts[key] = AgentHost(player_type, move_deadline, rss_limit)
+    return _hosts[key]
+
+
+def close_hosts():
+    for agent_host in _hosts.values():
+        agent_host.close()
+    _hosts.clear()
+
+
+def serve(player_type):
+    """Agent process: play the games the host asks for until stdin closes"""
+    from agent1 import CustomPlayer
+    from agent2 import MinimaxPlayer
+    from agent3 import MCTSPlayer
+    from store import PositionStore, path_for
+
+    player_class = {"Agent": CustomPlayer, "minimax": MinimaxPlayer, "mcts": MCTSPlayer}[player_type]
+    # The protocol owns the real stdout; the agent's prints go to stderr
+    out = os.fdopen(os.dup(1), "wb", buffering=0)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    pipe = sys.stdin.buffer
+
+    def send(opcode, payload=b""):
+        out.write(HEADER.pack(opcode, len(payload)) + payload)
+
+    agent = None
+    while True:
+        header = pipe.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return
+        opcode, length = HEADER.unpack(header)
+        payload = pipe.read(length)
+        if opcode == STEP:
+            time_left, stats = struct.unpack("<d?", payload)
+            agent.time_left = None if math.isnan(time_left) else time_left
+            start = time.perf_counter()
+            x, y = agent.step()
+            reply = MOVE_REPLY.pack(x, y, time.perf_counter() - start)
+            if stats:
+                reply += json.dumps(getattr(agent, "search_stats", {}), default=float).encode()
+            send(MOVE, reply)
+        elif opcode == UPDATE:
+            agent.update(list(struct.unpack("<BB", payload)))
+        elif opcode == STONE:
+            player, x, y = struct.unpack("<BBB", payload)
+            agent.set_hex(player, [x, y])
+        elif opcode == NEW_GAME:
+            size, number = struct.unpack_from("<BB", payload)
+            agent = player_class(size, number, 3 - number)
+            positions = payload[2:].decode()
+            if positions and getattr(agent, "tt", None) is not None:
+                agent.store = PositionStore(path_for(positions, player_type, size, number), size)
+            send(READY, agent.name.encode())
+        elif opcode == END_GAME:
+            agent.end_game(struct.unpack("<B", payload)[0])
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
@@ -0,0 +1,225 @@
+import time
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    """Fixed-size hash table of searched positions.
+
+    Each slot holds (key, depth, flag, value, move, generation). A new entry
+    replaces the stored one when it is for the same position, when it was
+    searched at least as deep, or when the stored one is left over from an
+    earlier search, so the table never grows beyond 2**bits entries.
+    """
+
+    def __init__(self, bits=18):
+        self._mask = (1 << bits) - 1
+        self._slots = [None] * (1 << bits)
+        self._generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self):
+        return sum(1 for slot in self._slots if slot is not None)
+
+    def __contains__(self, key):
+        slot = self._slots[key & self._mask]
+        return slot is not None and slot[0] == key
+
+    def entries(self):
+        """Yield (key, depth, flag, value, move) for every stored position"""
+        for slot in self._slots:
+            if slot is not None:
+                yield slot[:5]
+
+    def new_search(self):
+        """Age existing entries and reset the per-search counters"""
+        self._generation += 1
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """Return (depth, flag, value, move) for key, or None"""
+        self.probes += 1
+        slot = self._slots[key & self._mask]
+        if slot is None or slot[0] != key:
+            return None
+        self.hits += 1
+        return slot[1:5]
+
+    def store(self, key, depth, flag, value, move):
+        index = key & self._mask
+        slot = self._slots[index]
+        if (slot is None or slot[0] == key or depth >= slot[1]
+                or slot[5] != self._generation):
+            self._slots[index] = (key, depth, flag, value, move, self._generation)
+            self.stores += 1
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self):
+        self._slots = [None] * len(self._slots)
+
+
+def bound_flag(value, alpha, beta):
+    """Classify a search result against the window it was searched with"""
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
+
+
+def probe_window(table, key, depth, alpha, beta):
+    """Look key up and narrow the (alpha, beta) window with what is stored.
+
+    Returns (value, alpha, beta, move). value is not None when the stored
+    result settles the node outright; move is the stored best move, if any.
+    """
+    entry = table.probe(key)
+    if entry is None:
+        return None, alpha, beta, None
+    stored_depth, flag, value, move = entry
+    if stored_depth >= depth:
+        if flag == EXACT:
+            return value, alpha, beta, move
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value, alpha, beta, move
+    return None, alpha, beta, move
+
+
+def move_first(moves, move):
+    """Put move at the front of moves if it is one of them"""
+    if move is not None and move in moves:
+        moves.remove(move)
+        moves.insert(0, move)
+    return moves
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when the move's time budget has run out"""
+
+
+class TimeManager:
+    """Splits what is left of a player's clock over the moves still to come.
+
+    start() is called once per step() with the seconds left on the clock
+    (None when the game is untimed) and the number of empty cells. A new
+    iteration should only be started while can_deepen() holds, and poll()
+    is called once per node to abort an iteration that overruns. Setting
+    move_time gives every move that fixed budget instead (still capped by
+    the clock, if any), which is how offline tools run the agents.
+    """
+
+    def __init__(self, safety=0.1, fill=0.6, min_moves=4, poll_interval=64, move_time=None):
+        self.safety = safety  # fraction of the clock never planned for
+        self.fill = fill  # expected fraction of empty cells still to be played
+        self.min_moves = min_moves
+        self.poll_interval = poll_interval
+        self.move_time = move_time
+        self.deadline = None
+        self.soft_deadline = None
+        self._polls = 0
+
+    def start(self, time_left, free_cells):
+        self._polls = 0
+        if time_left is None and self.move_time is None:
+            self.deadline = self.soft_deadline = None
+            return None
+        budget = float("inf")
+        if time_left is not None:
+            moves_left = max(self.min_moves, int(free_cells * self.fill / 2))
+            budget = max(time_left, 0.0) * (1 - self.safety) / moves_left
+        if self.move_time is not None:
+            budget = min(budget, self.move_time)
+        now = time.perf_counter()
+        self.deadline = now + budget
+        # An iteration usually costs several times the previous one, so do
+        # not begin one that would most likely be cut off.
+        self.soft_deadline = now + budget / 2
+        return budget
+
+    def can_deepen(self):
+        return self.soft_deadline is None or time.perf_counter() < self.soft_deadline
+
+    def poll(self):
+        if self.deadline is None:
+            return
+        self._polls += 1
+        if self._polls % self.poll_interval == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+
+class MoveOrderer:
+    """Ranks candidate moves so that alpha-beta tries the likely best first.
+
+    In order of priority: the transposition-table move, the killer moves
+    that caused a cutoff at the same ply, then a static score (saving an
+    intruded bridge, stones nearby, forming a bridge) plus the history
+    heuristic, which accumulates depth*depth for every cutoff a move made.
+    Given an evaluator's policy priors, prior_weight times a move's prior is
+    added to its static score.
+    """
+
+    def __init__(self, size, killers=2, prior_weight=1000):
+        self.size = size
+        self.killer_slots = killers
+        self.prior_weight = prior_weight
+        self.killers = {}
+        self.history = [[0] * (size * size) for _ in range(3)]
+
+    def new_search(self):
+        self.killers = {}
+        # Keep some history across moves, but let recent searches dominate
+        for table in self.history[1:]:
+            for i in range(len(table)):
+                table[i] >>= 1
+
+    def order(self, board, player, ply, moves, tt_move=None, priors=None):
+        geo = board._geometry
+        cells = board._cells
+        size = self.size
+        history = self.history[player]
+        killers = self.killers.get(ply, ())
+        center = (size - 1) / 2
+        scored = []
+        for move in moves:
+            index = move[0] * size + move[1]
+            if move == tt_move:
+                score = 1e9
+            elif index in killers:
+                score = 1e8 - killers.index(index)
+            else:
+                score = history[index] - abs(move[0] - center) - abs(move[1] - center)
+                for neighbor in geo.adjacent[index]:
+                    if cells[neighbor]:
+                        score += 100
+                for end, partner, other in geo.carried[index]:
+                    if cells[end] == player and cells[partner] == player and cells[other] == 3 - player:
+                        score += 5000  # the opponent intruded: reply in the other carrier
+                for partner, first, second in geo.bridges[index]:
+                    if cells[partner] == player and not cells[first] and not cells[second]:
+                        score += 300
+                if priors is not None:
+                    score += self.prior_weight * priors[index]
+            scored.append((score, move))
+        scored.sort(key=lambda item: -item[0])
+        return [move for _, move in scored]
+
+    def record_cutoff(self, move, player, ply, depth):
+        index = move[0] * self.size + move[1]
+        killers = self.killers.setdefault(ply, [])
+        if index in killers:
+            killers.remove(index)
+        killers.insert(0, index)
+        del killers[self.killer_slots:]
+        self.history[player][index] += depth * depth
@@ -0,0 +1,204 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from main import run_single_game
+
+PLAYER_TYPES = ["Agent", "minimax", "mcts"]
+MANIFEST = "manifest.json"
+
+
+def position_dtype(size):
+    """One row per move played.
+
+    planes holds player 1's and player 2's stones before the move, player
+    is the mover, move the flat index x*size + y played, score the mover's
+    search score on its agent's own scale (NaN when the move was not
+    searched, e.g. from the book) and outcome +1 if the mover went on to
+    win the game, -1 if not.
+    """
+    return np.dtype([("planes", "i1", (2, size, size)), ("player", "i1"), ("move", "<i2"),
+                     ("score", "<f4"), ("outcome", "i1"), ("game", "<i4")])
+
+
+class ShardWriter:
+    """Collects rows in one preallocated shard and writes it out whenever it fills.
+
+    Shards are plain .npy files of a structured dtype, so they can be
+    memory-mapped with np.load(path, mmap_mode="r"). Only the last shard
+    of a stream may hold fewer than shard_size rows.
+    """
+
+    def __init__(self, directory, prefix, size, shard_size):
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self._rows = np.zeros(shard_size, dtype=position_dtype(size))
+        self._count = 0
+        self._games = set()
+        self.shards = []
+
+    def add(self, rows):
+        start = 0
+        while start < len(rows):
+            take = min(len(rows) - start, self.shard_size - self._count)
+            self._rows[self._count:self._count + take] = rows[start:start + take]
+            self._games.update(rows["game"][start:start + take].tolist())
+            self._count += take
+            start += take
+            if self._count == self.shard_size:
+                self.flush()
+
+    def flush(self):
+        if not self._count:
+            return
+        name = f"{self.prefix}_{len(self.shards):05d}.npy"
+        path = os.path.join(self.directory, name)
+        # Written under another name and renamed, so a shard in the
+        # directory is always complete
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, self._rows[:self._count])
+        os.replace(path + ".tmp", path)
+        self.shards.append({"file": name, "rows": self._count, "games": sorted(self._games)})
+        self._count = 0
+        self._games = set()
+
+
+class GameCollector:
+    """Controller tracer that turns every move of a game into a position row.
+
+    The position before a move is read off the mover's own board after
+    step(), with the new stone taken out again. Rows of the current game
+    are held until its outcome is known and then handed to the writer, so
+    memory stays at one game plus one shard.
+    """
+
+    def __init__(self, writer, size):
+        self.writer = writer
+        self.size = size
+        self.game = 0
+        self._rows = np.zeros(size * size, dtype=position_dtype(size))
+        self._count = 0
+        self._player = None
+
+    def start_game(self, size, player1, player2, time_limit):
+        self._count = 0
+
+    def start_move(self, number, player):
+        self._player = player
+
+    def end_step(self, agent, coordinates):
+        index = coordinates[0] * self.size + coordinates[1]
+        cells = np.array(agent._cells, dtype=np.int8)
+        cells[index] = 0
+        rows, i = self._rows, self._count
+        rows["planes"][i, 0] = (cells == 1).reshape(self.size, self.size)
+        rows["planes"][i, 1] = (cells == 2).reshape(self.size, self.size)
+        rows["player"][i] = self._player
+        rows["move"][i] = index
+        score = agent.search_stats.get("score")
+        rows["score"][i] = math.nan if score is None else score
+        rows["game"][i] = self.game
+        self._count += 1
+
+    def end_move(self, time_left, winner):
+        if winner:
+            self._end_game(winner)
+
+    def lost_on_time(self, player):
+        self._count -= 1  # the move was never played
+        self._end_game(3 - player)
+
+    def forfeit(self, player, reason):
+        self._end_game(3 - player)  # step() never returned, so no row was added
+
+    def _end_game(self, winner):
+        rows = self._rows[:self._count]
+        rows["outcome"] = np.where(rows["player"] == winner, 1, -1)
+        self.writer.add(rows)
+
+
+def _play_games(job):
+    """Worker entry point: play every game of one worker's share into its own shard stream"""
+    worker, games, directory, size, players, seed, opening, time_limit, shard_size = job
+    writer = ShardWriter(directory, f"shard_w{worker}", size, shard_size)
+    collector = GameCollector(writer, size)
+    winners = []
+    for game in games:
+        collector.game = game
+        result = run_single_game(size, players[0], players[1], seed=seed + game, time_limit=time_limit,
+                                 tracer=collector, opening=opening)
+        winners.append(result["winner"])
+    writer.flush()
+    return worker, writer.shards, winners
+
+
+def generate(directory, games, size=7, players=("Agent", "Agent"), seed=0, opening=2, time_limit=None,
+             shard_size=4096, workers=1):
+    """Play self-play games into shards under directory and write the manifest.
+
+    Game i is seeded with seed + i, which fixes its random opening (and
+    every other random choice), and is played by worker i % workers.
+    Untimed games are therefore reproducible for the same seed and worker
+    count.
+    """
+    os.makedirs(directory, exist_ok=True)
+    jobs = [(w, list(range(w, games, workers)), directory, size, list(players), seed, opening, time_limit,
+             shard_size) for w in range(workers)]
+    start = time.time()
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_play_games, jobs)
+    else:
+        results = [_play_games(job) for job in jobs]
+
+    shards = [shard for _, worker_shards, _ in sorted(results, key=lambda r: r[0]) for shard in worker_shards]
+    winners = [winner for _, _, worker_winners in results for winner in worker_winners]
+    manifest = {
+        "size": size,
+        "players": list(players),
+        "games": games,
+        "seed": seed,
+        "opening": opening,
+        "time_limit": time_limit,
+        "shard_size": shard_size,
+        "dtype": np.lib.format.dtype_to_descr(position_dtype(size)),
+        "positions": sum(shard["rows"] for shard in shards),
+        "player1_wins": winners.count(1),
+        "shards": shards,
+    }
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    print(f"{games} games, {manifest['positions']} positions in {len(shards)} shard(s) "
+          f"in {time.time() - start:.1f}s")
+    return manifest
+
+
+def open_shards(directory):
+    """(manifest, memory-mapped shard arrays); nothing is read until rows are used"""
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    return manifest, [np.load(os.path.join(directory, shard["file"]), mmap_mode="r")
+                      for shard in manifest["shards"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate self-play training data")
+    parser.add_argument("output", help="Directory for the shards and manifest.json")
+    parser.add_argument("--games", type=int, default=100, help="Number of games")
+    parser.add_argument("--size", type=int, default=7, help="Grid size")
+    parser.add_argument("--players", nargs=2, choices=PLAYER_TYPES, default=["Agent", "Agent"], help="Player types")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed; game i uses seed + i")
+    parser.add_argument("--opening", type=int, default=2, help="Random moves played before the agents take over")
+    parser.add_argument("--time-limit", type=float, default=0, help="Seconds on each player's clock (0 for untimed)")
+    parser.add_argument("--shard-size", type=int, default=4096, help="Positions per shard")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to spread games over")
+    args = parser.parse_args()
+    generate(args.output, args.games, args.size, args.players, args.seed, args.opening,
+             args.time_limit if args.time_limit > 0 else None, args.shard_size, args.workers)
+
+if __name__ == "__main__":
+    main()
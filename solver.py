@@ -0,0 +1,208 @@
+import time
+from analysis import CellAnalysis
+from board import geometry
+from search import SearchTimeout
+
+# Proof and disproof numbers saturate here; a node at INFINITY is settled
+INFINITY = 10 ** 9
+
+
+class ProofCache:
+    """Fixed-size table of proof and disproof numbers.
+
+    Each slot holds (key, phi, delta, move, work) for the player to move:
+    phi is the proof number of a win for that player, delta the proof
+    number of a loss (zero once proven), move the child that decided it and
+    work the number of nodes the entry took. A new entry replaces the
+    stored one for the same position or when it took at least as much
+    work, so the expensive results, proofs in particular, outlive the move
+    they were found in.
+    """
+
+    def __init__(self, bits=18):
+        self._mask = (1 << bits) - 1
+        self._slots = [None] * (1 << bits)
+
+    def __len__(self):
+        return sum(1 for slot in self._slots if slot is not None)
+
+    def probe(self, key):
+        """Return (phi, delta, move) for key, or None"""
+        slot = self._slots[key & self._mask]
+        if slot is None or slot[0] != key:
+            return None
+        return slot[1:4]
+
+    def store(self, key, phi, delta, move, work):
+        index = key & self._mask
+        slot = self._slots[index]
+        if slot is None or slot[0] == key or work >= slot[4]:
+            self._slots[index] = (key, phi, delta, move, work)
+
+    def clear(self):
+        self._slots = [None] * len(self._slots)
+
+
+class ProofNumberSolver:
+    """Depth-first proof-number search (df-pn) for exact endgame results.
+
+    Hex has no draws and stones are never removed, so the positions form a
+    DAG and every one is a win for exactly one side. Each node is written
+    from the point of view of the player to move: phi is the min of its
+    children's delta, delta the sum of their phi, and the search always
+    descends into the child with the smallest delta, with thresholds that
+    send it back up as soon as a sibling looks cheaper.
+
+    Before any child is generated, a node is settled by the cells that
+    connect either player at once (one of the mover's wins it, two of the
+    opponent's lose it, one must be blocked), and dead cells, which cannot
+    change the outcome, are not searched.
+
+    solve() stops at its time limit or, when called without one, after
+    max_nodes nodes; the proof cache is kept, so a later call picks up where an
+    unfinished one stopped. After every call, nodes, proven (nodes settled
+    in that call) and elapsed describe the work done.
+    """
+
+    def __init__(self, size, cache_bits=18, max_nodes=20000, poll_interval=256):
+        self.size = size
+        self._geometry = geometry(size)
+        self._analysis = CellAnalysis(size)
+        self.cache = ProofCache(cache_bits)
+        self.max_nodes = max_nodes
+        self.poll_interval = poll_interval
+        self.nodes = 0
+        self.proven = 0
+        self.elapsed = 0.0
+        self._deadline = None
+        self._node_limit = max_nodes
+        center = (size - 1) / 2
+        self._order = [abs(x - center) + abs(y - center) + abs(x + y - 2 * center)
+                       for x, y in self._geometry.coords]
+
+    def solve(self, board, player, time_limit=None):
+        """Prove or disprove a win for player, who is to move on board.
+
+        Returns (result, move): result is True for a proven win, with move a
+        winning [x, y], False for a proven loss and None when the budget ran
+        out first.
+        """
+        start = time.perf_counter()
+        self._deadline = None if time_limit is None else start + time_limit
+        # A timed solve may use all of its time; the node cap only bounds untimed ones
+        self._node_limit = self.max_nodes if time_limit is None else float("inf")
+        self.nodes = 0
+        self.proven = 0
+        root = board.ply()
+        try:
+            phi, delta, move, _ = self._mid(board, player, INFINITY, INFINITY)
+        except SearchTimeout:
+            board.rewind(root)
+            phi = delta = move = None
+        self.elapsed = time.perf_counter() - start
+        if phi == 0:
+            return True, list(self._geometry.coords[move])
+        if delta == 0:
+            return False, None
+        return None, None
+
+    def stats(self):
+        return {"solver_nodes": self.nodes, "solver_proven": self.proven, "solver_time": self.elapsed}
+
+    def _winning_cells(self, stones, empty, player):
+        """Empty cells that connect player's two edges when played"""
+        geo = self._geometry
+        start, end = geo.edges[player]
+        reached = []
+        for edge in (start, end):
+            group = stones & edge
+            while True:
+                grown = geo.dilate(group) & stones
+                if grown == group:
+                    break
+                group = grown
+            reached.append(geo.dilate(group) | edge)
+        return empty & reached[0] & reached[1]
+
+    def _mid(self, board, player, phi_limit, delta_limit):
+        """Search the node until its phi or delta reaches its limit.
+
+        Returns (phi, delta, move, work); the result is cached as well.
+        """
+        self.nodes += 1
+        if self.nodes % self.poll_interval == 0:
+            if self.nodes >= self._node_limit or (
+                    self._deadline is not None and time.perf_counter() > self._deadline):
+                raise SearchTimeout()
+        # A position and its 180-degree rotation share one entry, whose
+        # move is stored for the canonical orientation
+        key, rotated = board.canonical_key()
+        geo = self._geometry
+        last = geo.cells - 1
+        entry = self.cache.probe(key)
+        if entry is not None:
+            phi, delta, move = entry
+            if phi >= phi_limit or delta >= delta_limit:
+                if rotated and move is not None:
+                    move = last - move
+                return phi, delta, move, 0
+
+        stones = board._stones
+        empty = geo.full & ~(stones[1] | stones[2])
+        wins = self._winning_cells(stones[player], empty, player)
+        if wins:
+            return self._store(key, rotated, 0, INFINITY, (wins & -wins).bit_length() - 1, 1)
+        threats = self._winning_cells(stones[3 - player], empty, 3 - player)
+        if threats & (threats - 1):
+            return self._store(key, rotated, INFINITY, 0, None, 1)  # cannot block both
+        if threats:
+            moves = [threats.bit_length() - 1]
+        else:
+            live = empty & ~self._analysis.dead(board)
+            moves = []
+            bits = live or empty
+            while bits:
+                low = bits & -bits
+                moves.append(low.bit_length() - 1)
+                bits ^= low
+            moves.sort(key=self._order.__getitem__)
+
+        # Children are seen from the opponent's side: their phi is our delta
+        zobrist = geo.zobrist[player]
+        plain, turned = board._hash, board._rotated_hash
+        phis = []
+        deltas = []
+        for index in moves:
+            entry = self.cache.probe(min(plain ^ zobrist[index], turned ^ zobrist[last - index]))
+            if entry is None:
+                phis.append(1)
+                deltas.append(1)
+            else:
+                phis.append(entry[0])
+                deltas.append(entry[1])
+
+        coords = geo.coords
+        work = 1
+        while True:
+            phi = min(deltas)
+            delta = min(sum(phis), INFINITY)
+            if phi >= phi_limit or delta >= delta_limit:
+                break
+            best = deltas.index(phi)
+            second = min((d for i, d in enumerate(deltas) if i != best), default=INFINITY)
+            child_phi_limit = min(delta_limit - delta + phis[best], INFINITY)
+            child_delta_limit = min(phi_limit, second + 1)
+            board.play(coords[moves[best]], player)
+            phis[best], deltas[best], _, spent = self._mid(board, 3 - player, child_phi_limit,
+                                                           child_delta_limit)
+            board.undo()
+            work += spent
+
+        return self._store(key, rotated, phi, delta, moves[deltas.index(phi)], work)
+
+    def _store(self, key, rotated, phi, delta, move, work):
+        if phi == 0 or delta == 0:
+            self.proven += 1
+        stored = move if move is None or not rotated else self._geometry.cells - 1 - move
+        self.cache.store(key, phi, delta, stored, work)
+        return phi, delta, move, work
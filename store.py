@@ -0,0 +1,112 @@
+import fcntl
+import os
+import numpy as np
+
+DTYPE = np.dtype([("key", "<u8"), ("depth", "<i2"), ("flag", "u1"), ("move", "<i2"), ("value", "<f8")])
+
+# Slots a key may occupy, starting at key & mask
+WINDOW = 4
+
+
+class PositionStore:
+    """Fixed-size, open-addressed position table in a memory-mapped .npy file.
+
+    Each slot holds what a TranspositionTable entry holds: the Zobrist key,
+    the depth searched, the bound flag, the score and the best move (as a
+    flat index x*size + y, -1 for none). A key lives in one of WINDOW slots
+    from key & mask on; a new entry takes its own slot, then an empty one,
+    then the shallowest one if it was searched at least as deep. The empty
+    board's key is 0 and never stored, so key 0 marks an empty slot.
+
+    Opening maps the file without reading it, and pages are loaded as
+    probes touch them. Only entries searched at least min_depth plies deep
+    are read or written: shallower ones are cheaper to search again than to
+    look up. Scores are only comparable between searches by the same agent
+    type from the same seat, so each of those gets its own file (path_for).
+    """
+
+    def __init__(self, path, size, bits=20, min_depth=2):
+        self.path = path
+        self.size = size
+        self.min_depth = min_depth
+        if not os.path.exists(path):
+            # Built under another name and moved in place, so a process
+            # opening the path never sees a half-written header
+            partial = f"{path}.{os.getpid()}.tmp"
+            np.lib.format.open_memmap(partial, mode="w+", dtype=DTYPE,
+                                      shape=((1 << bits) + WINDOW - 1,)).flush()
+            os.replace(partial, path)
+        self._table = np.lib.format.open_memmap(path, mode="r+")
+        self._mask = len(self._table) - WINDOW
+        self._keys = self._table["key"]
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        """Return (depth, flag, value, move) for key, or None"""
+        self.probes += 1
+        start = key & self._mask
+        keys = self._keys[start:start + WINDOW].tolist()
+        if key not in keys:
+            return None
+        self.hits += 1
+        depth, flag, move, value = self._table[start + keys.index(key)].tolist()[1:]
+        if move < 0:
+            return depth, flag, value, None
+        return depth, flag, value, [move // self.size, move % self.size]
+
+    def load(self, table, key):
+        """Copy key's entry into a TranspositionTable that does not hold it yet"""
+        if key in table:
+            return
+        entry = self.probe(key)
+        if entry is not None:
+            table.store(key, *entry)
+
+    def store(self, key, depth, flag, value, move):
+        if not key or depth < self.min_depth:
+            return
+        start = key & self._mask
+        keys = self._keys[start:start + WINDOW].tolist()
+        if key in keys:
+            slot = start + keys.index(key)
+            if self._table["depth"][slot] > depth:
+                return
+        elif 0 in keys:
+            slot = start + keys.index(0)
+        else:
+            depths = self._table["depth"][start:start + WINDOW].tolist()
+            shallowest = min(depths)
+            if shallowest > depth:
+                return
+            slot = start + depths.index(shallowest)
+        index = -1 if move is None else move[0] * self.size + move[1]
+        # The key goes in last, so a reader never matches a half-written slot
+        self._table[slot] = (0, depth, flag, index, value)
+        self._keys[slot] = key
+
+    def save(self, table):
+        """Write every deep enough entry of a TranspositionTable back to the file.
+
+        An exclusive lock on the file keeps concurrent games from
+        interleaving their writes.
+        """
+        with open(self.path, "rb") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                for key, depth, flag, value, move in table.entries():
+                    self.store(key, depth, flag, value, move)
+                self._table.flush()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._keys))
+
+
+def path_for(directory, player_type, size, player_number):
+    return os.path.join(directory, f"{player_type}_{size}x{size}_p{player_number}.npy")
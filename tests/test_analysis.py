@@ -0,0 +1,131 @@
+import random
+from agent import Agent
+from analysis import CellAnalysis
+from board import DIRECTIONS
+
+
+def board_with(size, ones=(), twos=()):
+    board = Agent(size, 1, 2)
+    for move in ones:
+        board.set_hex(1, move)
+    for move in twos:
+        board.set_hex(2, move)
+    return board
+
+
+def cells(board, bits):
+    return board._geometry.cells_of(bits)
+
+
+def around(board, x, y):
+    """Owner of each neighbour in DIRECTIONS order; off-board ones belong to that edge's player"""
+    size = board.size
+    owners = []
+    for dx, dy in DIRECTIONS:
+        nx, ny = x + dx, y + dy
+        x_off, y_off = not 0 <= nx < size, not 0 <= ny < size
+        if x_off or y_off:
+            owners.append(None if x_off and y_off else (1 if x_off else 2))
+        else:
+            owners.append(board.get_hex([nx, ny]))
+    return owners
+
+
+def reference_dead(board):
+    dead = []
+    for x, y in board.free_moves():
+        owners = around(board, x, y)
+        if any(owners[i] in (1, 2) and all(owners[(i + k) % 6] == owners[i] for k in range(4)) for i in range(6)):
+            dead.append([x, y])
+    return dead
+
+
+def reference_captured(board):
+    size = board.size
+    captured = set()
+    for x, y in board.free_moves():
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            bx, by = x + dx, y + dy
+            if not (0 <= bx < size and 0 <= by < size) or board.get_hex([bx, by]):
+                continue
+            rest = [o for k, o in enumerate(around(board, x, y)) if k != d]
+            rest += [o for k, o in enumerate(around(board, bx, by)) if k != (d + 3) % 6]
+            if any(all(o == player for o in rest) for player in (1, 2)):
+                captured.update([(x, y), (bx, by)])
+    return sorted(map(list, captured))
+
+
+def test_dead_and_captured_match_a_brute_force_reference():
+    rng = random.Random(0)
+    for size in (3, 4, 5, 7):
+        analysis = CellAnalysis(size)
+        for _ in range(200):
+            board = Agent(size, 1, 2)
+            for move in board.free_moves():
+                board.set_hex(rng.choice((0, 0, 1, 2)), move)
+            assert cells(board, analysis.dead(board)) == reference_dead(board)
+            assert cells(board, analysis.captured(board)) == reference_captured(board)
+
+
+def test_dead_cells():
+    analysis = CellAnalysis(5)
+    # Four consecutive neighbours of player 1
+    board = board_with(5, ones=[[2, 1], [3, 1], [3, 2], [2, 3]])
+    assert [2, 2] in cells(board, analysis.dead(board))
+    # Three are not enough
+    board = board_with(5, ones=[[2, 1], [3, 1], [3, 2]])
+    assert [2, 2] not in cells(board, analysis.dead(board))
+    # Player 1's edge counts as two of its stones
+    board = board_with(5, ones=[[0, 1], [0, 3]])
+    assert cells(board, analysis.dead(board)) == [[0, 2]]
+
+
+def test_captured_pair():
+    analysis = CellAnalysis(5)
+    walls = [[2, 1], [3, 1], [2, 3], [1, 3], [1, 2], [4, 1], [4, 2], [3, 3]]
+    board = board_with(5, twos=walls)
+    assert [[2, 2], [3, 2]] == [c for c in cells(board, analysis.captured(board)) if c in ([2, 2], [3, 2])]
+    # One opening in the wall frees the pair
+    board.set_hex(0, [4, 2])
+    assert not {(2, 2), (3, 2)} & set(map(tuple, cells(board, analysis.captured(board))))
+
+
+def test_bridge_and_edge_template_carriers():
+    analysis = CellAnalysis(7)
+    board = board_with(7, twos=[[3, 2], [4, 3]])
+    assert cells(board, analysis.carriers(board, 1)) == [[3, 3], [4, 2]]
+    # Edge template II of a second-row stone
+    board = board_with(7, twos=[[3, 1]])
+    assert cells(board, analysis.carriers(board, 1)) == [[3, 0], [4, 0]]
+    # The opponent's own carriers are not pruned for it
+    assert cells(board, analysis.carriers(board, 2)) == []
+
+
+def test_carriers_kept_when_they_touch_own_stones_or_intrude_twice():
+    analysis = CellAnalysis(7)
+    # [4, 2] touches the mover's stone at [5, 2]
+    board = board_with(7, ones=[[5, 2]], twos=[[3, 2], [4, 3]])
+    assert cells(board, analysis.carriers(board, 1)) == [[3, 3]]
+    # [4, 2] carries both the [3, 2]-[4, 3] and the [3, 2]-[5, 1] bridge
+    board = board_with(7, twos=[[3, 2], [4, 3], [5, 1]])
+    assert cells(board, analysis.carriers(board, 1)) == [[3, 3], [4, 1]]
+    # [1, 3] touches the mover's edge at x=0
+    board = board_with(7, twos=[[1, 2], [2, 3]])
+    assert cells(board, analysis.carriers(board, 1)) == [[2, 2]]
+
+
+def test_intrusions_force_the_other_carrier():
+    analysis = CellAnalysis(7)
+    board = board_with(7, ones=[[3, 2], [4, 3]])
+    board.play([4, 2], 2)
+    assert analysis.forced(board, 1, [4, 2]) == [3 * 7 + 3]
+    assert analysis.candidates(board, 1, [4, 2]) == [[3, 3]]
+    # Without the last move nothing is forced, and the root keeps every cell
+    assert analysis.forced(board, 1, None) == []
+    board = board_with(7, ones=[[1, 3]])
+    board.play([0, 3], 2)
+    assert analysis.forced(board, 1, [0, 3]) == [0 * 7 + 4]
+    # A broken bridge forces nothing
+    board = board_with(7, ones=[[3, 2], [4, 3]], twos=[[3, 3]])
+    board.play([4, 2], 2)
+    assert analysis.forced(board, 1, [4, 2]) == []
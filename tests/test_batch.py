@@ -0,0 +1,67 @@
+import random
+import numpy as np
+import pytest
+from agent1 import CustomPlayer
+from agent2 import MinimaxPlayer
+
+
+def random_positions(cls, size, count, seed):
+    """Random positions with stones of both colours, not yet won, seen by player 1"""
+    rng = random.Random(seed)
+    cells = [[x, y] for x in range(size) for y in range(size)]
+    positions = []
+    while len(positions) < count:
+        board = cls(size, 1, 2)
+        rng.shuffle(cells)
+        for i, move in enumerate(cells[:rng.randrange(len(cells))]):
+            board.set_hex(1 + i % 2, move)
+        if board.free_moves() and not board.check_win(1) and not board.check_win(2):
+            positions.append(board)
+    return positions
+
+
+def children(board, mover, score):
+    """(won, score) of every child, played out one at a time"""
+    results = []
+    for move in board.free_moves():
+        board.play(move, mover)
+        results.append((board.check_win(mover), score(board)))
+        board.undo()
+    return results
+
+
+@pytest.mark.parametrize("size", [3, 5, 7])
+def test_custom_scores_match_evaluate_board(size):
+    for board in random_positions(CustomPlayer, size, 30, seed=size):
+        moves = board.free_moves()
+        for me in (1, 2):
+            board.player_number, board.adv_number = me, 3 - me
+            for mover in (1, 2):
+                wins, scores = board.batch.custom_scores(board, moves, mover, me)
+                expected = children(board, mover, board.evaluate_board)
+                assert wins.tolist() == [won for won, _ in expected]
+                assert scores.tolist() == pytest.approx([score for _, score in expected])
+
+
+@pytest.mark.parametrize("size", [3, 5, 7])
+def test_largest_groups_and_wins_match_the_heuristic(size):
+    for board in random_positions(MinimaxPlayer, size, 30, seed=size):
+        moves = board.free_moves()
+        for me in (1, 2):
+            board.player_number, board.adv_number = me, 3 - me
+            for mover in (1, 2):
+                wins, largest = board.batch.largest_groups(board, moves, mover, me)
+                expected = children(board, mover, board.heuristic)
+                assert wins.tolist() == [won for won, _ in expected]
+                assert largest.tolist() == [score for _, score in expected]
+                assert board.batch.wins(board, moves, mover).tolist() == wins.tolist()
+
+
+def test_stack_plays_each_move_on_its_own_board():
+    (board,) = random_positions(MinimaxPlayer, 5, 1, seed=0)
+    moves = board.free_moves()
+    stacked = board.batch.stack(board, moves, 2)
+    for move, child in zip(moves, stacked):
+        board.play(move, 2)
+        assert np.array_equal(child, np.array(board._cells).reshape(5, 5))
+        board.undo()
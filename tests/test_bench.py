@@ -0,0 +1,29 @@
+from agent1 import CustomPlayer
+from agent2 import MinimaxPlayer
+from agent3 import MCTSPlayer
+from bench import search_position
+
+
+def test_search_positions_seat_the_side_to_move_and_need_a_search():
+    for size in (3, 5, 7):
+        for seed in range(20):
+            for fill in (0.3, 0.5):
+                player = search_position(CustomPlayer, size, fill, seed)
+                assert player.player_number == player.to_move()
+                assert not player.check_win(1) and not player.check_win(2)
+                for move in player.free_moves():
+                    for side in (1, 2):
+                        player.play(move, side)
+                        assert not player.check_win(side)
+                        player.undo()
+
+
+def test_every_player_searches_the_positions():
+    for cls in (CustomPlayer, MinimaxPlayer, MCTSPlayer):
+        for seed in range(3):
+            player = search_position(cls, 5, 0.3, seed)
+            player.book = None
+            player.solver = None
+            player.step()
+            stats = player.search_stats
+            assert (stats["nodes"] if "nodes" in stats else stats["playouts"]) > 0
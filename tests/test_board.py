@@ -0,0 +1,98 @@
+import random
+from agent import Agent
+from grid import Grid
+
+
+def test_neighbors_result_can_be_modified():
+    agent = Agent(5, 1, 2)
+    grid = Grid(5)
+    expected = agent.neighbors([2, 2])
+    assert expected == grid.neighbors([2, 2])
+    for board in (agent, grid):
+        board.neighbors([2, 2]).append([9, 9])
+        board.neighbors([2, 2])[0][0] = 9
+    assert Agent(5, 1, 2).neighbors([2, 2]) == expected
+    assert grid.neighbors([2, 2]) == expected
+
+
+DIRECTIONS = [[0, -1], [1, -1], [1, 0], [0, 1], [-1, 1], [-1, 0]]
+
+
+def reference_win(cells, size, player):
+    """The original DFS: player 1 joins x=0 to x=size-1, player 2 y=0 to y=size-1"""
+    axis = 0 if player == 1 else 1
+    stack = [(x, y) for (x, y), owner in cells.items() if owner == player and (x, y)[axis] == 0]
+    seen = set(stack)
+    while stack:
+        cell = stack.pop()
+        if cell[axis] == size - 1:
+            return True
+        for dx, dy in DIRECTIONS:
+            neighbor = (cell[0] + dx, cell[1] + dy)
+            if cells.get(neighbor) == player and neighbor not in seen:
+                seen.add(neighbor)
+                stack.append(neighbor)
+    return False
+
+
+def test_check_win_and_free_moves_match_a_plain_dfs():
+    rng = random.Random(0)
+    for size in range(1, 14):
+        for _ in range(20):
+            cells = {(x, y): 0 for x in range(size) for y in range(size)}
+            boards = [Grid(size), Agent(size, 1, 2)]
+            for _ in range(rng.randrange(2 * size * size + 1)):
+                cell = rng.choice(list(cells))
+                # Mostly new stones, with overwrites and clears mixed in
+                player = rng.choice((0, 1, 2, 1, 2, 1, 2))
+                cells[cell] = player
+                for board in boards:
+                    board.set_hex(player, list(cell))
+                free = [list(c) for c in sorted(cells) if cells[c] == 0]
+                for board in boards:
+                    assert board.free_moves() == free
+                    for p in (1, 2):
+                        assert board.check_win(p) == reference_win(cells, size, p)
+
+
+def assert_free_list_matches_cells(agent):
+    size = agent.size
+    free = [[x, y] for x in range(size) for y in range(size) if agent._cells[x * size + y] == 0]
+    assert agent.free_moves() == free
+    assert agent.free_count() == len(free)
+    for x in range(size):
+        for y in range(size):
+            assert agent.is_free([x, y]) == (agent._cells[x * size + y] == 0)
+    # Walking the list backwards visits the same cells
+    head = size * size
+    backwards = []
+    index = agent._prev[head]
+    while index != head:
+        backwards.append(list(agent._geometry.coords[index]))
+        index = agent._prev[index]
+    assert backwards == free[::-1]
+
+
+def test_free_list_survives_play_undo_rewind_and_clears():
+    rng = random.Random(1)
+    for size in (1, 2, 3, 5, 8, 11):
+        agent = Agent(size, 1, 2)
+        for _ in range(400):
+            action = rng.random()
+            free = agent.free_moves()
+            if action < 0.45 and free:
+                agent.play(rng.choice(free))
+            elif action < 0.6:
+                # Overwrite any cell, empty or not, through play()
+                agent.play([rng.randrange(size), rng.randrange(size)], rng.choice((1, 2)))
+            elif action < 0.75 and agent.ply():
+                agent.undo()
+            elif action < 0.85:
+                agent.rewind(rng.randrange(agent.ply() + 1))
+            else:
+                # Outside play(): set_hex(0) re-frees a cell, or stones are placed directly
+                cell = [rng.randrange(size), rng.randrange(size)]
+                agent.rewind(0)
+                agent.set_hex(rng.choice((0, 0, 1, 2)), cell)
+            assert_free_list_matches_cells(agent)
+            assert_free_list_matches_cells(agent.copy())
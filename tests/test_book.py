@@ -0,0 +1,75 @@
+from agent import Agent
+from agent1 import CustomPlayer
+from book import OpeningBook, generate, save, verify
+from solver import ProofNumberSolver
+
+
+def empty_key(size):
+    return Agent(size, 1, 2).canonical_key()[0]
+
+
+def test_verify_replaces_a_move_that_throws_away_the_win():
+    # 3x3 from the empty board: the centre wins, the acute corner loses.
+    # The book has nothing after the corner, and after the new move it is
+    # not walked any further.
+    entries = {empty_key(3): 0}
+    checked = verify(3, entries, 3, time_limit=5)
+    assert checked == {empty_key(3)}
+    assert entries[empty_key(3)] != 0
+    x, y = divmod(entries[empty_key(3)], 3)
+    board = Agent(3, 1, 2)
+    board.play([x, y], 1)
+    assert ProofNumberSolver(3).solve(board, 2, time_limit=5)[0] is False
+
+
+def test_lookup_checked_skips_unconfirmed_moves(tmp_path):
+    path = tmp_path / "book.npz"
+    save(path, {5: {empty_key(5): 0}})
+    book = OpeningBook(path)
+    board = Agent(5, 1, 2)
+    assert book.lookup(board) == [0, 0]
+    assert book.lookup(board, checked=True) is None
+    save(path, {5: {empty_key(5): 0}}, {5: {empty_key(5)}})
+    assert OpeningBook(path).lookup(board, checked=True) == [0, 0]
+
+
+def test_generated_book_starts_from_the_centre():
+    entries = generate(3, "mcts", 1, move_time=0.01)
+    assert entries == {empty_key(3): 4}
+
+
+def test_custom_player_only_plays_checked_book_moves(tmp_path):
+    path = tmp_path / "book.npz"
+    save(path, {5: {empty_key(5): 0}})
+    player = CustomPlayer(5, 1, 2)
+    player.book = OpeningBook(path)
+    assert player.step() == [2, 2]
+
+    # Player 2's reply to the centre: searched while unchecked, played once checked
+    board = Agent(5, 1, 2)
+    board.set_hex(1, [2, 2])
+    key, rotated = board.canonical_key()
+    corner = 24 if rotated else 0
+    for checked, expected in ((set(), False), ({key}, True)):
+        save(path, {5: {key: corner}}, {5: checked})
+        player = CustomPlayer(5, 2, 1)
+        player.book = OpeningBook(path)
+        player.set_hex(1, [2, 2])
+        assert (player.step() == [0, 0]) == expected
+
+
+def test_shipped_book_agrees_with_the_solver_where_checked():
+    book = OpeningBook()
+    book.sizes()
+    for size in (3, 4):
+        keys, moves, checked = book._tables[size]
+        entries = dict(zip(keys.tolist(), moves.tolist()))
+        solved = dict(entries)
+        assert verify(size, solved, 3, time_limit=5) == {k for k, c in zip(keys.tolist(), checked) if c}
+        assert solved == entries
+    assert book._tables[3][2].all()
+
+
+def test_centre_opening_on_sizes_without_a_checked_first_move():
+    for size in (7, 9):
+        assert CustomPlayer(size, 1, 2).step() == [size // 2, size // 2]
@@ -0,0 +1,34 @@
+import json
+import os
+from agent import Agent
+from controller import Controller, Forfeit
+from instrumentation import MoveTracer
+from main import run_single_game
+
+
+def test_trace_records_current_and_peak_rss(tmp_path):
+    path = tmp_path / "game.jsonl"
+    run_single_game(3, "minimax", "minimax", seed=0, time_limit=None, tracer=MoveTracer(str(path)))
+    moves = [record for record in map(json.loads, path.read_text().splitlines()) if record["event"] == "move"]
+    assert moves
+    for record in moves:
+        assert "max_rss_kb" not in record
+        assert record["rss_kb"] > 0 and record["process_peak_rss_kb"] > 0
+
+
+class Crashing(Agent):
+    name = "crashing"
+
+    def step(self):
+        raise Forfeit("crashed")
+
+
+def test_profiled_move_that_forfeits_stops_the_profiler(tmp_path):
+    path = tmp_path / "game.jsonl"
+    tracer = MoveTracer(str(path), profile_move=1)
+    controller = Controller(3, Crashing(3, 1, 2), Agent(3, 2, 1), time_limit=None, tracer=tracer)
+    controller.update()
+    assert controller._forfeit == "crashed"
+    assert tracer._profiler is None
+    assert os.path.exists(tracer.profile_path)
+    assert json.loads(path.read_text().splitlines()[-1])["event"] == "end"
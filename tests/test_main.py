@@ -0,0 +1,28 @@
+import pytest
+import main
+
+
+class FakePool:
+    def __init__(self, workers):
+        self.calls = []
+        FakePool.last = self
+
+    def imap(self, function, jobs):
+        yield function(jobs[0])
+        raise KeyboardInterrupt
+
+    def close(self):
+        self.calls.append("close")
+
+    def terminate(self):
+        self.calls.append("terminate")
+
+    def join(self):
+        self.calls.append("join")
+
+
+def test_interrupted_evaluation_terminates_the_pool(monkeypatch):
+    monkeypatch.setattr(main.multiprocessing, "Pool", FakePool)
+    with pytest.raises(KeyboardInterrupt):
+        main.run_evaluation(num_games=3, size=3, workers=2, time_limit=None)
+    assert FakePool.last.calls == ["terminate", "join"]
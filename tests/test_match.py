@@ -0,0 +1,21 @@
+import main
+import match
+
+
+def test_pairs_with_different_seeds_play_different_games(monkeypatch):
+    games = []
+
+    def recorded(*args, **kwargs):
+        result = main.run_single_game(*args, **kwargs)
+        games.append(result["moves"])
+        return result
+
+    monkeypatch.setattr(match, "run_single_game", recorded)
+    for seed in range(3):
+        match._play_pair((seed, 4, "minimax", "Agent", seed, None, None, 2))
+    assert len(games) == 6
+    firsts = [tuple(map(tuple, moves)) for moves in games[::2]]
+    assert len(set(firsts)) == 3
+    # Both games of a pair start from the same opening
+    for a, b in zip(games[::2], games[1::2]):
+        assert a[:2] == b[:2]
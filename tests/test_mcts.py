@@ -0,0 +1,16 @@
+import numpy as np
+from agent3 import MCTSPlayer, Node
+
+
+def test_each_iteration_backs_up_one_visit():
+    np.random.seed(0)
+    player = MCTSPlayer(5, 1, 2)
+    root = Node(None, None, 2, player._shuffled(player.free_moves()))
+    playouts = sum(player._iterate(root) for _ in range(100))
+    assert playouts == 100 * player.batch_size
+    assert root.visits == 100
+    assert sum(child.visits for child in root.children) == 100
+    for child in root.children:
+        assert 0 <= child.wins <= child.visits
+    # The tree is left as it was found
+    assert player.free_count() == 25 and player.ply() == 0
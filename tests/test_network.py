@@ -0,0 +1,27 @@
+import random
+import numpy as np
+import pytest
+from agent import Agent
+from network import NetworkEvaluator, init_weights
+
+
+def test_evaluate_batch_matches_evaluate_across_chunks():
+    evaluator = NetworkEvaluator(init_weights(channels=8, layers=2, seed=3))
+    rng = random.Random(0)
+    boards = []
+    for _ in range(150):
+        board = Agent(5, 1, 2)
+        for i, move in enumerate(rng.sample(board.free_moves(), rng.randrange(20))):
+            board.set_hex(1 + i % 2, move)
+        boards.append(board)
+    for to_move in (1, 2):
+        # evaluate() scores each board with its own side to move, so group by it
+        same = [b for b in boards if b.to_move() == to_move]
+        assert len(same) > 2 * evaluator.chunk  # split over three chunks or more
+        cells = np.array([b._cells for b in same], dtype=np.int8)
+        for player in (1, 2):
+            batched = evaluator.evaluate_batch(cells, player, to_move)
+            assert batched.tolist() == pytest.approx([evaluator.evaluate(b, player) for b in same], abs=1e-4)
+            evaluator.chunk = len(cells)
+            assert evaluator.evaluate_batch(cells, player, to_move).tolist() == pytest.approx(batched.tolist(), abs=1e-4)
+            evaluator.chunk = 32
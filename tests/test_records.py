@@ -0,0 +1,71 @@
+import pytest
+import records
+
+
+def test_decisive_positions_stop_before_the_winning_move():
+    won = records.from_coordinates(3, ("Agent", "minimax"), 1, 0, [[0, 0], [0, 1], [1, 0], [0, 2], [2, 0]])
+    timed_out = records.from_coordinates(3, ("Agent", "minimax"), 2, 1, [[0, 0]])
+    positions = list(records.decisive_positions([won, timed_out]))
+    assert len(positions) == 1
+    grid, move = positions[0]
+    assert move == 2 * 3 + 0
+    assert grid.get_hex((2, 0)) == 0 and grid.get_hex((1, 0)) == 1
+    assert not grid.check_win(1)
+
+
+def test_decisive_command_prints_positions(tmp_path, capsys, monkeypatch):
+    path = str(tmp_path / "games.bin")
+    records.append(path, records.from_coordinates(3, ("Agent", "minimax"), 1, 0, [[0, 0], [0, 1], [1, 0], [0, 2], [2, 0]]))
+    monkeypatch.setattr("sys.argv", ["records.py", "decisive", path])
+    records.main()
+    assert "winning move [2, 0]" in capsys.readouterr().out
+
+
+def test_forfeit_reasons_round_trip_and_are_skipped(tmp_path):
+    path = str(tmp_path / "games.bin")
+    moves = [[0, 0], [0, 1], [1, 0], [0, 2], [2, 0]]
+    played = records.from_coordinates(3, ("Agent", "minimax"), 1, 0, moves)
+    for reason in records.FORFEITS[2:]:
+        records.append(path, records.from_coordinates(3, ("Agent", "minimax"), 1, 0, moves[:3], reason))
+    records.append(path, records.from_coordinates(3, ("Agent", "minimax"), 1, 2, moves[:3], "time"))
+    records.append(path, played)
+    games = records.read(path)
+    assert [g.forfeit for g in games] == ["memory", "crashed", "protocol", "time", None]
+    assert games[3].lost_on_time == 2 and games[-1] == played
+    assert [move for _, move in records.decisive_positions(games)] == [2 * 3 + 0]
+    summary = records.summarize(games)
+    assert summary["first_moves"] == {0: (1, 1)}
+    assert summary["winning_cells"] == {6: 1}
+    assert summary["lost_on_time"] == 1
+    assert summary["forfeits"] == {"memory": 1, "crashed": 1, "protocol": 1}
+
+
+def test_records_without_a_stored_reason_read_time_losses_as_forfeits():
+    old = bytes([records.MAGIC, 3, 1 | 2 << 2, 1]) + b"A" + bytes([1]) + b"B" + bytes([1, 0])
+    (game,) = records.decode_all(old)
+    assert game.lost_on_time == 2 and game.forfeit == "time"
+
+
+def test_every_truncation_raises_value_error(tmp_path, monkeypatch):
+    data = b"".join(records.encode(records.from_coordinates(7, ("Agent", "minimax"), 1, 0, moves))
+                    for moves in ([[0, 0], [6, 6], [3, 3]], [[x, 3] for x in range(7)]))
+    assert len(list(records.decode_all(data))) == 2
+    first = len(records.encode(records.from_coordinates(7, ("Agent", "minimax"), 1, 0, [[0, 0], [6, 6], [3, 3]])))
+    for cut in range(1, len(data)):
+        if cut == first:
+            continue  # a whole record
+        with pytest.raises(ValueError, match="truncated record"):
+            list(records.decode_all(data[:cut]))
+
+    path = tmp_path / "partial.bin"
+    path.write_bytes(data[:-1])
+    monkeypatch.setattr("sys.argv", ["records.py", "stats", str(path)])
+    with pytest.raises(SystemExit, match="truncated record"):
+        records.main()
+
+
+def test_moves_off_the_board_are_rejected():
+    data = bytearray(records.encode(records.from_coordinates(3, ("a", "b"), 1, 0, [[2, 2]])))
+    data[-1] = 9
+    with pytest.raises(ValueError, match="off the board"):
+        list(records.decode_all(bytes(data)))
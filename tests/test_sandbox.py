@@ -0,0 +1,30 @@
+import pytest
+import sandbox
+from main import run_single_game
+
+
+@pytest.fixture(autouse=True)
+def close_hosts():
+    yield
+    sandbox.close_hosts()
+
+
+@pytest.mark.parametrize("players", [("minimax", "minimax"), ("Agent", "Agent"), ("Agent", "minimax")])
+def test_hosted_games_match_in_process_games(players):
+    for seed in range(2):
+        local = run_single_game(4, *players, seed=seed, time_limit=None, opening=2)
+        hosted = run_single_game(4, *players, seed=seed, time_limit=None, opening=2, hosted=(None, None))
+        assert hosted["moves"] == local["moves"]
+        assert hosted["winner"] == local["winner"]
+        assert hosted["forfeit"] is None
+
+
+def test_same_type_seats_get_separate_hosts():
+    assert sandbox.host("minimax", 1) is not sandbox.host("minimax", 2)
+    assert sandbox.host("minimax", 1) is sandbox.host("minimax", 1)
+
+
+def test_missed_deadline_forfeits_on_time():
+    result = run_single_game(7, "Agent", "minimax", seed=0, time_limit=None, hosted=(0.01, None))
+    assert result["forfeit"] == "time"
+    assert result["lost_on_time"] == result["winner"] ^ 3
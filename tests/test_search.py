@@ -0,0 +1,93 @@
+import random
+import numpy as np
+import pytest
+from agent import Agent
+from agent1 import CustomPlayer
+from agent2 import MinimaxPlayer
+from search import EXACT, LOWER, UPPER, TranspositionTable, bound_flag, probe_window
+
+
+def rebuilt(board, rotate=False):
+    """A fresh Agent holding board's stones, turned by 180 degrees if asked"""
+    fresh = Agent(board.size, 1, 2)
+    for index, owner in enumerate(board._cells):
+        if owner:
+            move = list(board._geometry.coords[index])
+            fresh.set_hex(owner, board.rotate(move) if rotate else move)
+    return fresh
+
+
+def test_incremental_hashes_match_a_rebuilt_board():
+    rng = random.Random(0)
+    for size in (2, 5, 9):
+        board = Agent(size, 1, 2)
+        for _ in range(300):
+            free = board.free_moves()
+            if free and rng.random() < 0.6:
+                board.play(rng.choice(free))
+            elif board.ply():
+                board.undo()
+            if rng.random() < 0.1:
+                board.rewind(0)
+                board.set_hex(rng.choice((0, 1, 2)), [rng.randrange(size), rng.randrange(size)])
+            assert board.position_key() == rebuilt(board).position_key()
+            assert board._rotated_hash == rebuilt(board, rotate=True).position_key()
+
+
+def random_position(cls, size, stones, seed):
+    rng = random.Random(seed)
+    while True:
+        board = cls(size, 1 + stones % 2, 2 - stones % 2)
+        cells = [[x, y] for x in range(size) for y in range(size)]
+        rng.shuffle(cells)
+        for i, move in enumerate(cells[:stones]):
+            board.set_hex(1 + i % 2, move)
+        if not board.check_win(1) and not board.check_win(2):
+            return board
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_transposition_table_leaves_the_search_result_unchanged(seed):
+    results = []
+    for cls, search in ((MinimaxPlayer, lambda p, moves: p._search_root(moves, 3)),
+                        (CustomPlayer, lambda p, moves: p.minimax(p, 3, -np.inf, np.inf, True))):
+        for tt in (True, False):
+            player = random_position(cls, 5, 6 + seed % 2, seed)
+            # Forced replies depend on the move that led to a position, and
+            # the branch_width cut on the move order the table changes, so
+            # both are off to compare the table alone
+            player.analysis = None
+            player.branch_width = player.size * player.size
+            if not tt:
+                player.tt = None
+            results.append(search(player, player.free_moves()))
+    assert results[0] == results[1]
+    assert results[2] == results[3]
+
+
+def test_probe_window_uses_entries_only_as_deep_as_asked_for():
+    table = TranspositionTable(bits=4)
+    assert probe_window(table, 5, 2, -10, 10) == (None, -10, 10, None)
+    table.store(5, 2, EXACT, 3, [0, 1])
+    assert probe_window(table, 5, 2, -10, 10) == (3, -10, 10, [0, 1])
+    # A shallower entry only suggests its move
+    assert probe_window(table, 5, 3, -10, 10) == (None, -10, 10, [0, 1])
+    table.store(5, 2, LOWER, 4, [0, 2])
+    assert probe_window(table, 5, 2, -10, 10) == (None, 4, 10, [0, 2])
+    assert probe_window(table, 5, 2, -10, 4)[0] == 4
+    table.store(5, 2, UPPER, -4, None)
+    assert probe_window(table, 5, 2, -10, 10) == (None, -10, -4, None)
+    assert probe_window(table, 5, 2, -4, 10)[0] == -4
+    assert [bound_flag(v, -1, 1) for v in (-1, 0, 1)] == [UPPER, EXACT, LOWER]
+
+
+def test_table_keeps_the_deeper_entry_within_a_search():
+    table = TranspositionTable(bits=2)
+    table.store(1, 3, EXACT, 1, None)
+    table.store(5, 2, EXACT, 2, None)  # same slot, shallower: dropped
+    assert 1 in table and 5 not in table
+    table.store(1, 1, EXACT, 3, None)  # same position: always replaced
+    assert table.probe(1) == (1, EXACT, 3, None)
+    table.new_search()
+    table.store(5, 0, EXACT, 4, None)  # left over from the last search: replaced
+    assert 5 in table and 1 not in table
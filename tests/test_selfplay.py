@@ -0,0 +1,28 @@
+import numpy as np
+from selfplay import generate, open_shards
+
+
+def test_shards_and_manifest_read_back_and_repeat_for_a_seed(tmp_path, capsys):
+    manifests = []
+    for run in ("a", "b"):
+        directory = str(tmp_path / run)
+        manifests.append((directory, generate(directory, 3, size=4, players=("minimax", "minimax"), seed=7,
+                                             shard_size=8)))
+    (first, manifest), (second, _) = manifests
+    read, shards = open_shards(first)
+    # JSON turns the dtype's tuples into lists, which still describe it
+    assert np.lib.format.descr_to_dtype(read.pop("dtype")) == shards[0].dtype
+    manifest.pop("dtype")
+    assert read == manifest
+    assert len(shards) > 1 and all(len(shard) <= 8 for shard in shards)
+    assert sum(len(shard) for shard in shards) == manifest["positions"]
+    rows = np.concatenate(shards)
+    assert sorted(set(rows["game"].tolist())) == [0, 1, 2]
+    for row in rows:
+        stones = row["planes"].sum(axis=0).ravel()
+        assert stones[row["move"]] == 0  # the position is the one before the move
+        assert row["outcome"] in (1, -1)
+    _, again = open_shards(second)
+    assert len(again) == len(shards)
+    for a, b in zip(shards, again):
+        assert a.tobytes() == b.tobytes()
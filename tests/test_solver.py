@@ -0,0 +1,13 @@
+from agent import Agent
+from solver import ProofNumberSolver
+
+
+def test_node_cap_only_bounds_untimed_solves():
+    board = Agent(5, 1, 2)
+    untimed = ProofNumberSolver(5, max_nodes=1000)
+    assert untimed.solve(board, 1) == (None, None)
+    assert untimed.nodes < 2000
+    timed = ProofNumberSolver(5, max_nodes=1000)
+    assert timed.solve(board, 1, time_limit=0.5) == (None, None)
+    assert timed.nodes > 2000
+    assert timed.elapsed >= 0.5
@@ -0,0 +1,50 @@
+from search import EXACT, LOWER, UPPER, TranspositionTable
+from store import WINDOW, PositionStore, path_for
+
+
+def test_store_round_trips_deep_entries_through_the_file(tmp_path):
+    path = str(tmp_path / "store.npy")
+    table = TranspositionTable(bits=8)
+    table.store(12345, 3, EXACT, 1.5, [2, 1])
+    table.store(777, 2, LOWER, -4.0, None)
+    table.store(999, 1, UPPER, 2.0, [0, 0])  # below min_depth: not kept
+    PositionStore(path, 5, bits=8).save(table)
+
+    store = PositionStore(path, 5, bits=8)
+    assert len(store) == 2
+    assert store.probe(12345) == (3, EXACT, 1.5, [2, 1])
+    assert store.probe(777) == (2, LOWER, -4.0, None)
+    assert store.probe(999) is None
+    loaded = TranspositionTable(bits=8)
+    store.load(loaded, 12345)
+    assert loaded.probe(12345) == (3, EXACT, 1.5, [2, 1])
+
+
+def test_deeper_entries_replace_shallower_ones(tmp_path):
+    store = PositionStore(str(tmp_path / "store.npy"), 5, bits=4)
+    store.store(5, 4, EXACT, 1.0, None)
+    store.store(5, 2, EXACT, 2.0, None)  # same position, shallower: kept out
+    assert store.probe(5) == (4, EXACT, 1.0, None)
+    store.store(5, 6, EXACT, 3.0, None)
+    assert store.probe(5) == (6, EXACT, 3.0, None)
+
+    # Fill the other slots of 5's window, then collide once more
+    mask = (1 << 4)
+    colliding = [5 + mask * i for i in range(1, WINDOW)]
+    for depth, key in zip((3, 4, 5), colliding):
+        store.store(key, depth, EXACT, 0.0, None)
+    store.store(5 + mask * WINDOW, 2, EXACT, 0.0, None)  # shallower than all: dropped
+    assert store.probe(5 + mask * WINDOW) is None
+    store.store(5 + mask * WINDOW, 3, EXACT, 0.0, None)  # takes the depth-3 slot
+    assert store.probe(5 + mask * WINDOW) is not None
+    assert store.probe(colliding[0]) is None
+    assert store.probe(5) is not None
+
+
+def test_each_seat_has_its_own_file(tmp_path):
+    first = PositionStore(path_for(str(tmp_path), "Agent", 5, 1), 5, bits=8)
+    second = PositionStore(path_for(str(tmp_path), "Agent", 5, 2), 5, bits=8)
+    assert first.path != second.path
+    first.store(4242, 3, EXACT, 7.0, None)
+    assert second.probe(4242) is None
+    assert PositionStore(path_for(str(tmp_path), "Agent", 5, 1), 5, bits=8).probe(4242) is not None
@@ -0,0 +1,60 @@
+import random
+import pytest
+from agent1 import CustomPlayer
+from agent2 import MinimaxPlayer
+from evaluation import ResistanceEvaluator
+from network import NetworkEvaluator, init_weights
+
+
+def random_boards(cls, size, count, seed=0):
+    """(board, rotated board) pairs of random positions, both seen by player 1"""
+    rng = random.Random(seed)
+    cells = [[x, y] for x in range(size) for y in range(size)]
+    for _ in range(count):
+        board = cls(size, 1, 2)
+        turned = cls(size, 1, 2)
+        rng.shuffle(cells)
+        for i, move in enumerate(cells[:rng.randrange(len(cells))]):
+            board.set_hex(1 + i % 2, move)
+            turned.set_hex(1 + i % 2, board.rotate(move))
+        yield board, turned
+
+
+@pytest.mark.parametrize("size", [4, 5, 7, 9])
+def test_custom_evaluation_is_rotation_symmetric(size):
+    for board, turned in random_boards(CustomPlayer, size, 50):
+        for player in (1, 2):
+            board.player_number, board.adv_number = player, 3 - player
+            turned.player_number, turned.adv_number = player, 3 - player
+            assert board.evaluate_board(board) == turned.evaluate_board(turned)
+            assert board.edge_connectivity(board, player) == turned.edge_connectivity(turned, player)
+        assert board.canonical_key()[0] == turned.canonical_key()[0]
+
+
+@pytest.mark.parametrize("size", [5, 9])
+def test_minimax_and_resistance_evaluations_are_rotation_symmetric(size):
+    evaluator = ResistanceEvaluator(size)
+    for board, turned in random_boards(MinimaxPlayer, size, 20):
+        assert board.heuristic(board) == turned.heuristic(turned)
+        assert evaluator.evaluate(board, 1) == pytest.approx(evaluator.evaluate(turned, 1))
+
+
+def test_batched_leaves_match_the_custom_evaluation():
+    for board, _ in random_boards(CustomPlayer, 7, 20, seed=1):
+        moves = board.free_moves()
+        if not moves:
+            continue
+        mover = board.to_move()
+        _, scores = board.batch.custom_scores(board, moves, mover, 1)
+        for move, score in zip(moves, scores.tolist()):
+            board.play(move, mover)
+            assert board.evaluate_board(board) == pytest.approx(score)
+            board.undo()
+
+
+def test_asymmetric_evaluator_keys_on_the_plain_hash():
+    for board, turned in random_boards(CustomPlayer, 5, 20, seed=2):
+        board.evaluator = turned.evaluator = NetworkEvaluator(init_weights(8, 1))
+        assert board._key(board) == (board._hash, False)
+        board.evaluator = turned.evaluator = ResistanceEvaluator(5)
+        assert board._key(board)[0] == turned._key(turned)[0]
@@ -0,0 +1,39 @@
+import pytest
+from agent1 import CustomPlayer
+from agent2 import MinimaxPlayer
+from search import SearchTimeout
+
+
+def out_of_time():
+    raise SearchTimeout()
+
+
+@pytest.mark.parametrize("cls", [CustomPlayer, MinimaxPlayer])
+def test_timed_out_search_falls_back_to_an_ordered_move(cls):
+    player = cls(7, 1, 2)
+    player.book = None
+    player.solver = None
+    player.set_hex(1, [3, 3])
+    player.set_hex(2, [2, 4])
+    player.time_left = 60.0
+    player.clock.poll = out_of_time
+    move = player.step()
+    assert player.depth_reached == 0
+    assert move != [0, 0]
+    # Next to the stones or the centre, not at the edge of the board
+    assert 0 < move[0] < 6 and 0 < move[1] < 6
+
+
+@pytest.mark.parametrize("cls", [CustomPlayer, MinimaxPlayer])
+def test_timed_out_search_prefers_the_stored_move(cls):
+    player = cls(7, 1, 2)
+    player.book = None
+    player.solver = None
+    player.set_hex(1, [3, 3])
+    player.set_hex(2, [2, 4])
+    key, rotated = player._key(player)
+    stored = [5, 1]
+    player.tt.store(key, 2, 0, 0.0, player.rotate(stored) if rotated else stored)
+    player.time_left = 60.0
+    player.clock.poll = out_of_time
+    assert player.step() == stored